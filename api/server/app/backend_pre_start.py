@@ -3,7 +3,7 @@ import os
 from sqlalchemy import text
 
 
-from app.db.session import SessionDB
+from app.db.session import SessionDB, dispose_engines
 from app.db.redis import Redis
 
 
@@ -22,6 +22,7 @@ def init() -> None:
         for row in select:
             print(row)
         db.close()
+        dispose_engines()
         logger.info("Database connection closed")
         redis = Redis()
         _redis = redis.client
@@ -35,7 +36,7 @@ def init() -> None:
         _redis.close()
         logger.info("Initial data created")
     except Exception as e:
-        logger.error(f"An error occurred: {e}")
+        logger.error("An error occurred: %s", e)
         raise e
 
 
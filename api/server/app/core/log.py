@@ -0,0 +1,139 @@
+from logging.config import fileConfig
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict
+
+import atexit
+import json
+import logging
+import os
+import queue
+
+
+QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+# attributes of every LogRecord, anything else on a record came in through extra=, except
+# uvicorn's color_message, a copy of the message with terminal colours
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'rid', 'color_message'}
+# arguments that render the same on the listener thread as they would have on the caller's
+_SAFE_ARGS = (str, int, float, bool, type(None), BaseException)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the request id and any extra= fields of the record.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'rid': getattr(record, 'rid', '-'),
+            'func': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread, and drops them, counting, when its queue is full
+    rather than making the event loop wait for stdout.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the message is formatted on the listener thread, unless an argument is an object such as
+        # an ORM row that may change, or not render at all, once the request has moved on
+        if record.args and not all(isinstance(arg, _SAFE_ARGS) for arg in
+                                   (record.args.values() if isinstance(record.args, dict) else record.args)):
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+
+    def __init__(self, log_queue: queue.Queue, queue_handler: DroppingQueueHandler, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self.reported = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        dropped = self.queue_handler.dropped
+        if dropped != self.reported:
+            super().handle(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': 'Log queue full, dropped %d records', 'args': (dropped - self.reported,)}))
+            self.reported = dropped
+        super().handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # wait for room, the sentinel must not be dropped on a full queue
+        self.queue.put(self._sentinel)
+
+
+_listener = None
+
+
+def setup(config_path: str) -> None:
+    """
+    Configure logging from config_path, then move the root handlers behind a bounded queue
+    drained by a listener thread, so emitting a record never waits on the handlers' I/O.
+    Loggers with handlers of their own log through the root instead.
+    """
+    global _listener
+    fileConfig(config_path, disable_existing_loggers=False)
+
+    # e.g. uvicorn.error and uvicorn.access, handed gunicorn's stream handlers by the worker before
+    # the app is imported; a logger left without handlers, like a disabled access log, stays silent
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        if isinstance(logger, logging.Logger) and any(not isinstance(handler, logging.NullHandler) for handler in logger.handlers):
+            logger.handlers = []
+            logger.propagate = True
+
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    log_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = _Listener(log_queue, queue_handler, *handlers)
+    _listener.start()
+    atexit.register(_listener.stop)
+    os.register_at_fork(after_in_child=_restart_listener)
+
+
+def _restart_listener() -> None:
+    # threads do not survive a fork, e.g. gunicorn --preload
+    _listener._thread = None
+    _listener.start()
+
+
+def log_stats() -> Dict[str, int]:
+    """
+    Fill level of the log queue and the records dropped because it was full.
+    """
+    if _listener is None:
+        return {}
+    return {
+        'queued': _listener.queue.qsize(),
+        'capacity': _listener.queue.maxsize,
+        'dropped': _listener.queue_handler.dropped,
+    }
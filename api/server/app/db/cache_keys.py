@@ -0,0 +1,143 @@
+"""
+Every Redis key the API uses is built here.
+
+Cached content is stored one key per exam/question, under a version taken from
+CACHE_KEY_VERSION. Bumping it orphans every cached entry at once, the old keys then
+expire through their TTL. Keys holding state rather than cache (orders, buffered
+answers) are never versioned.
+
+The keys of an examination also carry its own version, kept in Redis and bumped on every
+write to the exam or its questions, so one INCR orphans all of them.
+"""
+import os
+
+
+VERSION = os.environ.get('CACHE_KEY_VERSION', '1')
+
+# Seconds each namespace lives in Redis.
+TTL = {
+    'questions': int(os.environ.get('CACHE_TTL_QUESTIONS', 6 * 3600)),
+    'examination_questions': int(os.environ.get('CACHE_TTL_EXAMINATION_QUESTIONS', 6 * 3600)),
+    'examinations': int(os.environ.get('CACHE_TTL_EXAMINATIONS', 6 * 3600)),
+    'question_choices': int(os.environ.get('CACHE_TTL_QUESTION_CHOICES', 6 * 3600)),
+    'exam_attempts': int(os.environ.get('CACHE_TTL_EXAM_ATTEMPTS', 12 * 3600)),
+    'answer_sheets': int(os.environ.get('CACHE_TTL_ANSWER_SHEETS', 12 * 3600)),
+    'orders': int(os.environ.get('CACHE_TTL_ORDERS', 3 * 24 * 3600)),
+    'admit_cards': int(os.environ.get('CACHE_TTL_ADMIT_CARDS', 6 * 3600)),
+    'championships': int(os.environ.get('CACHE_TTL_CHAMPIONSHIPS', 3600)),
+    'championship_examinations': int(os.environ.get('CACHE_TTL_CHAMPIONSHIP_EXAMINATIONS', 3600)),
+    # outlives every key built from it, or a reset version could hand out keys filled before a bump
+    'examination_versions': int(os.environ.get('CACHE_TTL_EXAMINATION_VERSIONS', 7 * 24 * 3600)),
+}
+
+
+def championships(_=None) -> str:
+    # the one listing of active championships, the argument only fits build
+    return f'championships:v{VERSION}'
+
+
+def championship_examinations(championship_id: int) -> str:
+    return f'championship:{championship_id}:v{VERSION}:examinations'
+
+
+def question(question_id: int) -> str:
+    return f'question:{question_id}:v{VERSION}'
+
+
+def question_choices(question_id: int) -> str:
+    return f'question:{question_id}:v{VERSION}:choices'
+
+
+def examination_version(examination_id: int) -> str:
+    # the exam's own version, the keys below take its value as exam_version
+    return f'exam:{examination_id}:version'
+
+
+def examination(examination_id: int, exam_version: int) -> str:
+    return f'exam:{examination_id}:v{VERSION}.{exam_version}'
+
+
+def examination_questions(examination_id: int, exam_version: int) -> str:
+    return f'exam:{examination_id}:v{VERSION}.{exam_version}:questions'
+
+
+def examination_window(examination_id: int, exam_version: int) -> str:
+    # 'start end' of the exam in epoch seconds, read by the exam gate
+    return f'exam:{examination_id}:v{VERSION}.{exam_version}:window'
+
+
+def examination_warmup(examination_id: int, exam_version: int) -> str:
+    # set once an exam has been warmed so only one worker does it
+    return f'exam:{examination_id}:v{VERSION}.{exam_version}:warmed'
+
+
+def exam_attempt(examination_id: int, exam_version: int, admit_card_id: int) -> str:
+    return f'exam:{examination_id}:v{VERSION}.{exam_version}:attempt:{admit_card_id}'
+
+
+def answer_sheet(examination_id: int, exam_version: int, admit_card_id: int) -> str:
+    return f'exam:{examination_id}:v{VERSION}.{exam_version}:attempt:{admit_card_id}:answers'
+
+
+def order(order_id: str) -> str:
+    return f'order:{order_id}'
+
+
+def legacy_order(order_id: str) -> str:
+    # orders created before this scheme were stored under the bare order id
+    return order_id
+
+
+def admit_card(admit_card_id: int) -> str:
+    return f'admit_card:{admit_card_id}:v{VERSION}'
+
+
+def token_version(admit_card_id: int) -> str:
+    # bumped to revoke every token issued to the admit card
+    return f'admit_card:{admit_card_id}:token_version'
+
+
+def login_bucket(scope: str, ident) -> str:
+    # token bucket of login attempts, scope is 'admit_card' or 'ip'
+    return f'login:bucket:{scope}:{ident}'
+
+
+def login_unknown(admit_card_id: int) -> str:
+    # set for a while once an admit card id was not found
+    return f'login:unknown:{admit_card_id}'
+
+
+def answers_pending(admit_card_id: int) -> str:
+    return f'answers:pending:{admit_card_id}'
+
+
+def answer_sheet_version(admit_card_id: int) -> str:
+    # changes on every answer write of the admit card, part of the question list ETag
+    return f'answers:version:{admit_card_id}'
+
+
+def answers_lock(admit_card_id: int) -> str:
+    return f'answers:lock:{admit_card_id}'
+
+
+ANSWERS_DIRTY = 'answers:dirty'
+
+
+def fill_lock(key: str) -> str:
+    # held by the one worker loading key from Postgres
+    return f'{key}:lock'
+
+
+# Cached namespaces, also the names of the matching local caches. The keys of an examination
+# are dropped by bumping its version instead, see invalidation.invalidate_examination.
+_BUILDERS = {
+    'questions': question,
+    'question_choices': question_choices,
+    'championships': championships,
+    'championship_examinations': championship_examinations,
+    'admit_cards': admit_card,
+}
+
+
+def build(namespace: str, key) -> str:
+    return _BUILDERS[namespace](key)
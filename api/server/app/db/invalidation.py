@@ -0,0 +1,129 @@
+from app.db.redis import AsyncRedis
+from app.db.local_cache import get_local_cache, clear_local_caches
+from app.db import cache_keys
+from app.utils import serializer
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Every worker listens here and evicts what an admin write made stale.
+CHANNEL = 'cache:invalidate'
+
+
+def _evict(entries: Iterable[Tuple[str, Any]]) -> None:
+    for namespace, key in entries:
+        get_local_cache(namespace).delete(key)
+
+
+# channel -> handler of its decoded JSON messages, run by every worker's subscriber
+_handlers: Dict[str, Callable[[Any], Awaitable[None]]] = {}
+_running = set()
+
+
+def add_handler(channel: str, handler: Callable[[Any], Awaitable[None]]) -> None:
+    """
+    Have every worker's subscriber run handler for the JSON messages published on channel.
+    """
+    _handlers[channel] = handler
+
+
+async def _dispatch(channel: str, data: Any) -> None:
+    try:
+        await _handlers[channel](data)
+    except Exception as e:
+        logger.error('Error handling message on %s: %s', channel, e)
+
+
+async def invalidate(*entries: Tuple[str, Any]) -> None:
+    """
+    Drop cached exam content in Redis and in the local cache of every worker.
+
+    entries are (namespace, key) pairs, see cache_keys.build for the namespaces.
+    Call it after the write is committed, so a reader can not cache the old row again.
+    """
+    _evict(entries)
+    try:
+        client = AsyncRedis().client
+        async with client.pipeline(transaction=False) as pipe:
+            for namespace, key in entries:
+                pipe.delete(cache_keys.build(namespace, key))
+            pipe.publish(CHANNEL, serializer.dumps(entries))
+            await pipe.execute()
+    except Exception as e:
+        logger.error('Error publishing cache invalidation %s: %s', entries, e)
+
+
+# Local caches keyed by examination id, dropped with every version bump.
+EXAMINATION_NAMESPACES = ('examination_versions', 'examinations', 'examination_questions')
+
+
+async def examination_version(cache, examination_id: int) -> int:
+    """
+    Current version of an examination's keys, cached by this worker until the next bump.
+    """
+    local_versions = get_local_cache('examination_versions')
+    version = local_versions.get(examination_id)
+    if version is None:
+        version = int(await cache.get(cache_keys.examination_version(examination_id)) or 0)
+        local_versions.set(examination_id, version)
+    return version
+
+
+async def invalidate_examination(examination_id: int, *entries: Tuple[str, Any]) -> None:
+    """
+    Bump the version of an examination, orphaning every Redis key built from it, and drop it from
+    the local cache of every worker, together with entries as invalidate does.
+
+    Call it after the write is committed, the orphaned keys expire through their TTL.
+    """
+    entries = tuple((namespace, examination_id) for namespace in EXAMINATION_NAMESPACES) + entries
+    _evict(entries)
+    try:
+        client = AsyncRedis().client
+        version_key = cache_keys.examination_version(examination_id)
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.incr(version_key)
+            pipe.expire(version_key, cache_keys.TTL['examination_versions'])
+            for namespace, key in entries:
+                if namespace not in EXAMINATION_NAMESPACES:
+                    pipe.delete(cache_keys.build(namespace, key))
+            pipe.publish(CHANNEL, serializer.dumps(entries))
+            await pipe.execute()
+    except Exception as e:
+        logger.error('Error bumping the cache version of examination %s: %s', examination_id, e)
+
+
+async def run_subscriber() -> None:
+    """
+    Background task evicting this worker's local cache entries published by any worker,
+    and running the other handlers added with add_handler.
+    """
+    while True:
+        pubsub = AsyncRedis().client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(CHANNEL, *_handlers)
+            # events sent while we were not listening are lost, start from an empty local cache
+            clear_local_caches()
+            while True:
+                message = await pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                if message['channel'] == CHANNEL:
+                    _evict(serializer.loads(message['data']))
+                else:
+                    # other handlers may hit Redis or Postgres, they must not hold up evictions
+                    task = asyncio.create_task(_dispatch(message['channel'], serializer.loads(message['data'])))
+                    _running.add(task)
+                    task.add_done_callback(_running.discard)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error('Error listening for cache invalidations: %s', e)
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
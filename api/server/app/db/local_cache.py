@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import os
+import time
+
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Each worker has its own copy, so it only suits data that is identical for every
+    candidate and may be a few seconds stale, like exam content. Values are shared
+    between requests and must not be mutated by callers.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING or entry[0] < time.monotonic():
+            if entry is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+_caches: Dict[str, LocalCache] = {}
+
+
+def get_local_cache(name: str, maxsize: Optional[int] = None, ttl: Optional[float] = None) -> LocalCache:
+    """
+    Return the named cache of this worker, sized by LOCAL_CACHE_MAXSIZE and LOCAL_CACHE_TTL
+    unless maxsize or ttl are given when it is first created.
+    """
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = LocalCache(maxsize=int(os.environ.get('LOCAL_CACHE_MAXSIZE', 1024)) if maxsize is None else maxsize,
+                                           ttl=float(os.environ.get('LOCAL_CACHE_TTL', 60)) if ttl is None else ttl)
+    return cache
+
+
+def clear_local_caches() -> None:
+    for cache in _caches.values():
+        cache.clear()
+
+
+def local_cache_stats() -> Dict[str, Dict[str, int]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
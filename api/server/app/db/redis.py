@@ -1,4 +1,5 @@
 import redis
+import redis.asyncio as aioredis
 import os
 
 
@@ -8,4 +9,41 @@ class Redis:
         self.client = redis.Redis(host=os.getenv('REDIS_HOST'),\
                                    port=int(os.getenv('REDIS_PORT')),
                                    password=os.getenv('REDIS_PASS'),\
-                                   charset="utf-8", decode_responses=True)
\ No newline at end of file
+                                   charset="utf-8", decode_responses=True)
+
+
+# One async connection pool per worker process, shared by every request through deps.get_cache.
+_pools: dict = {}
+
+
+def get_pool() -> aioredis.ConnectionPool:
+    """
+    Return this process' async connection pool, creating it on first use.
+    """
+    pool = _pools.get(os.getpid())
+    if pool is None:
+        _pools.clear()
+        pool = aioredis.BlockingConnectionPool(host=os.getenv('REDIS_HOST'),
+                                               port=int(os.getenv('REDIS_PORT')),
+                                               password=os.getenv('REDIS_PASS'),
+                                               max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', 100)),
+                                               timeout=float(os.getenv('REDIS_POOL_TIMEOUT', 5)),                   # wait for a free connection instead of failing under bursts
+                                               health_check_interval=int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 30)),
+                                               socket_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', 5)),
+                                               socket_connect_timeout=float(os.getenv('REDIS_SOCKET_CONNECT_TIMEOUT', 5)),
+                                               socket_keepalive=True,
+                                               encoding="utf-8", decode_responses=True)
+        _pools[os.getpid()] = pool
+    return pool
+
+
+async def close_pool() -> None:
+    pool = _pools.pop(os.getpid(), None)
+    if pool is not None:
+        await pool.disconnect()
+
+
+class AsyncRedis:
+
+    def __init__(self):
+        self.client = aioredis.Redis(connection_pool=get_pool())
@@ -1,10 +1,104 @@
 from abc import abstractmethod
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 import os
+import threading
+import time
 import urllib
 from sqlalchemy.engine import URL
+from sqlalchemy import text
+
+
+# Engines and session factories are built once per process and keyed by database URL.
+# Each entry remembers the pid that created it so a forked gunicorn worker never reuses
+# the connections it inherited from its parent.
+_engines: dict = {}
+_async_engines: dict = {}
+_engines_lock = threading.Lock()
+
+
+def _engine_options() -> dict:
+      return dict(pool_size=int(os.environ.get('DB_POOL_SIZE', 30)),        # Per worker, keep workers * (pool_size + max_overflow) below max_connections
+                  max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),  # Adjust max_overflow accordingly based on peak load scenarios
+                  pool_timeout=30,        # Timeout in seconds before giving up on getting a connection from the pool
+                  pool_recycle=1800,      # Recycle connections after 30 minutes (1800 seconds)
+                  pool_pre_ping=True ,   # Check the connection health before use (recommended for PostgreSQL)
+                  echo=False               # Set to True to see SQL statements echoed to stdout (for debugging)
+                  )
+
+
+def get_engine(url: str):
+      """
+      Return the (engine, sessionmaker) pair for url, creating it on first use in this process.
+      """
+      entry = _engines.get(url)
+      if entry is not None and entry[0] == os.getpid():
+            return entry[1], entry[2]
+
+      with _engines_lock:
+            entry = _engines.get(url)
+            if entry is None or entry[0] != os.getpid():
+                  engine = create_engine(url, **_engine_options())
+                  session_local = sessionmaker(bind=engine,
+                  autocommit=False,
+                  autoflush=False,
+                  expire_on_commit=False)
+                  entry = (os.getpid(), engine, session_local)
+                  _engines[url] = entry
+      return entry[1], entry[2]
+
+
+def get_async_engine(url: str, connect_args: dict = None):
+      """
+      Return the (async engine, async sessionmaker) pair for url, creating it on first use in this process.
+      """
+      entry = _async_engines.get(url)
+      if entry is not None and entry[0] == os.getpid():
+            return entry[1], entry[2]
+
+      with _engines_lock:
+            entry = _async_engines.get(url)
+            if entry is None or entry[0] != os.getpid():
+                  engine = create_async_engine(url, connect_args=connect_args or {}, **_engine_options())
+                  session_local = async_sessionmaker(bind=engine,
+                  class_=AsyncSession,
+                  autoflush=False,
+                  expire_on_commit=False)
+                  entry = (os.getpid(), engine, session_local)
+                  _async_engines[url] = entry
+      return entry[1], entry[2]
+
+
+def dispose_engines(close: bool = True) -> None:
+      """
+      Dispose every engine owned by this process.
+
+      close=False drops the pooled connections without closing them, which is what a forked
+      child must do so it does not tear down sockets still used by its parent.
+      """
+      with _engines_lock:
+            for _, engine, _ in _engines.values():
+                  engine.dispose(close=close)
+            _engines.clear()
+            if not close:
+                  for _, engine, _ in _async_engines.values():
+                        engine.sync_engine.dispose(close=False)
+                  _async_engines.clear()
+
+
+async def dispose_async_engines() -> None:
+      """
+      Close every async engine owned by this process.
+      """
+      engines = [engine for _, engine, _ in _async_engines.values()]
+      _async_engines.clear()
+      for engine in engines:
+            await engine.dispose()
+
+
+os.register_at_fork(after_in_child=lambda: dispose_engines(close=False))
 
 
 
@@ -20,6 +114,8 @@ class Database:
             self.db_password = urllib.parse.quote_plus(os.environ.get('DB_PASS'))
             self.ssl_mode = urllib.parse.quote_plus(str(os.environ.get('ssl_mode','prefer')))
             self.SQLALCHEMY_DATABASE_URL = 'postgresql://{}:{}@{}:{}/{}?sslmode={}'.format(self.db_username, self.db_password, self.host_server, self.db_server_port, self.database_name, self.ssl_mode)
+            # asyncpg takes the ssl mode as a connect argument instead of a sslmode query parameter
+            self.SQLALCHEMY_ASYNC_DATABASE_URL = 'postgresql+asyncpg://{}:{}@{}:{}/{}'.format(self.db_username, self.db_password, self.host_server, self.db_server_port, self.database_name)
 
 
       @abstractmethod
@@ -33,29 +129,87 @@ class SessionDB(Database):
       def __init__(self) -> None:
             super().__init__()
 
+            self.engine, self.session_local = get_engine(self.SQLALCHEMY_DATABASE_URL)
 
-            self.engine = create_engine(self.SQLALCHEMY_DATABASE_URL,
-                                         pool_size=30,           # Set pool_size to 30, respecting the max_connections limit of PostgreSQL
-                                          max_overflow=10,        # Adjust max_overflow accordingly based on peak load scenarios
-                                          pool_timeout=30,        # Timeout in seconds before giving up on getting a connection from the pool
-                                          pool_recycle=1800,      # Recycle connections after 30 minutes (1800 seconds)
-                                          pool_pre_ping=True ,   # Check the connection health before use (recommended for PostgreSQL)
-                                          echo=False               # Set to True to see SQL statements echoed to stdout (for debugging)
-                                )
-           
 
 
       def get_session(self):
-            session_local = sessionmaker(bind=self.engine,
-            autocommit=False,
-            autoflush=False,
-            expire_on_commit=False)
-            return session_local()
+            return self.session_local()
 
 
+class AsyncSessionDB(Database):
+
+
+      def __init__(self) -> None:
+            super().__init__()
+
+            self.engine, self.session_local = get_async_engine(self.SQLALCHEMY_ASYNC_DATABASE_URL,
+                                                               connect_args={'ssl': urllib.parse.unquote_plus(self.ssl_mode)})
+
+
+
+      def get_session(self) -> AsyncSession:
+            return self.session_local()
+
+
+# Seconds of replay lag on the replica; 0 when it has replayed everything it received or is not a standby.
+REPLICA_LAG_QUERY = text(
+      "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+      "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+# Last lag probe result for this process, shared by every ReplicaSessionDB.
+_replica_state = {'pid': None, 'checked_at': 0.0, 'fresh': False}
+
+
+class ReplicaSessionDB(Database):
+      """
+      Optional read replica, enabled by setting DB_REPLICA_HOST (and DB_REPLICA_PORT if it differs).
+      Credentials and database name are shared with the primary.
+      """
+
+
+      def __init__(self) -> None:
+            super().__init__()
+            self.engine = self.session_local = None
+            replica_host = os.environ.get('DB_REPLICA_HOST')
+            if replica_host:
+                  replica_port = urllib.parse.quote_plus(str(os.environ.get('DB_REPLICA_PORT', self.db_server_port)))
+                  url = 'postgresql+asyncpg://{}:{}@{}:{}/{}'.format(self.db_username, self.db_password, replica_host, replica_port, self.database_name)
+                  self.engine, self.session_local = get_async_engine(url, connect_args={'ssl': urllib.parse.unquote_plus(self.ssl_mode),
+                                                                                         'timeout': float(os.environ.get('DB_REPLICA_CONNECT_TIMEOUT', 3))})
+
+
+      async def is_fresh(self) -> bool:
+            """
+            Whether the replica is reachable and lagging less than DB_REPLICA_MAX_LAG seconds.
+
+            The probe runs at most once every DB_REPLICA_LAG_CHECK_INTERVAL seconds per process;
+            requests in between reuse the last answer.
+            """
+            if self.engine is None:
+                  return False
+
+            now = time.monotonic()
+            interval = float(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 5))
+            if _replica_state['pid'] == os.getpid() and now - _replica_state['checked_at'] < interval:
+                  return _replica_state['fresh']
+
+            # claim the probe before awaiting so concurrent requests keep using the previous answer
+            _replica_state.update(pid=os.getpid(), checked_at=now)
+            try:
+                  async with self.engine.connect() as conn:
+                        lag = (await conn.execute(REPLICA_LAG_QUERY)).scalar()
+                  _replica_state['fresh'] = float(lag or 0) <= float(os.environ.get('DB_REPLICA_MAX_LAG', 2))
+            except Exception:
+                  _replica_state['fresh'] = False
+            return _replica_state['fresh']
+
+
+      def get_session(self) -> AsyncSession:
+            return self.session_local() if self.session_local else None
 
 
-     
 
 
 
@@ -0,0 +1,101 @@
+from app.db import cache_keys
+from app.db.session import AsyncSessionDB
+from app.utils import serializer
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import asyncio
+import os
+import uuid
+
+
+# key -> task loading it in this worker
+_inflight: Dict[str, asyncio.Task] = {}
+
+# Drop the fill lock only while it still holds our token, past its TTL another worker may own it.
+# KEYS: lock   ARGV: token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+async def single_flight(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run load once per key in this worker, concurrent callers await the same result.
+
+    The load runs in its own task, so a caller that gets cancelled does not cancel it for the others.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _inflight.pop(key, None) if _inflight.get(key) is done else None)
+    return await asyncio.shield(task)
+
+
+async def fetch_once(cache, key: str, read: Callable[[], Awaitable[Optional[Any]]], load: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Return the cached value of key, filling it from Postgres with a single loader.
+
+    read returns the cached value or None, load queries Postgres and writes the cache.
+    Callers in this worker share one call, across workers a short Redis lock lets one
+    worker load while the others poll read until the value shows up.
+    """
+    return await single_flight(key, lambda: _locked_load(cache, key, read, load))
+
+
+async def fetch_json_once(cache, key: str, ttl: int, load: Callable[[Any], Awaitable[Any]],
+                          decode: Callable[[Any], Any] = None) -> Any:
+    """
+    fetch_once for values stored as JSON under key, load returns the value to store or None.
+    decode turns a parsed cached value back into what load returns, e.g. to parse datetimes.
+
+    load is called with a session of its own on the primary: the shared load outlives the
+    request that started it, and a replica could put rows just written back in the cache.
+    """
+    async def read():
+        cached = await cache.get(key)
+        if not cached:
+            return None
+        value = serializer.loads(cached)
+        return decode(value) if decode else value
+
+    async def load_and_store():
+        db = AsyncSessionDB().get_session()
+        try:
+            value = await load(db)
+        finally:
+            await db.close()
+        if value is not None:
+            await cache.set(key, serializer.dumps(value), ex=ttl)
+        return value
+
+    return await fetch_once(cache, key, read, load_and_store)
+
+
+async def _locked_load(cache, key: str, read, load) -> Any:
+    value = await read()
+    if value is not None:
+        return value
+
+    lock_ms = int(os.environ.get('CACHE_FILL_LOCK_MS', 3000))
+    loop = asyncio.get_running_loop()
+    token = uuid.uuid4().hex
+    if await cache.set(cache_keys.fill_lock(key), token, nx=True, px=lock_ms):
+        try:
+            return await load()
+        finally:
+            release = cache.register_script(RELEASE_SCRIPT)
+            await release(keys=[cache_keys.fill_lock(key)], args=[token])
+
+    deadline = loop.time() + lock_ms / 1000
+    while loop.time() < deadline:
+        await asyncio.sleep(0.05)
+        value = await read()
+        if value is not None:
+            return value
+    # the loader is too slow or gave up, load it ourselves rather than fail the request
+    return await load()
@@ -2,7 +2,7 @@ import logging
 
 
 from app.db.init_db import init_db
-from app.db.session import SessionDB
+from app.db.session import SessionDB, dispose_engines
 
 
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +14,7 @@ logger = logging.getLogger(__name__)
 def init() -> None:
     _db = SessionDB()
     init_db(_db)
+    dispose_engines()
 
 
 def main() -> None:
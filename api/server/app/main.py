@@ -1,10 +1,7 @@
 from pathlib import Path
+import asyncio
 import os
 import logging
-import time
-import random
-import string
-from logging.config import fileConfig
 
 
 from fastapi import FastAPI, APIRouter, Request, Depends,Response
@@ -21,20 +18,31 @@ from app.utils.app_exceptions import app_exception_handler
 from app.utils.app_exceptions import AppExceptionCase
 from app.utils.jwt import decode_jwt_token
 from app.middleware.exam_attempt import VerifyQuestionAttemptJWTMiddleware
+from app.middleware.request_log import RequestLogMiddleware
 from app.router.v1.api import api_router
 from app.router.v2.api import api_router as api_v2_router
 from app.router.admin.api import api_router as admin_router
+from app.db.session import AsyncSessionDB, ReplicaSessionDB, dispose_async_engines
+from app.db.redis import AsyncRedis, close_pool
+from app.db.local_cache import local_cache_stats
+from app.core.log import log_stats, setup as setup_logging
+from app.utils.serializer import ORJSONResponse
+from app.utils.password import pool_stats as password_pool_stats
+from app.services import answer_buffer
+from app.db import invalidation
+from app.services import warmup
 
 
 from app.core.config import settings
 
 
 root_router = APIRouter()
-app = FastAPI(title="StudyAbacus APIs", openapi_url=f"{settings.API_V1_STR}/openapi.json", docs_url="/docs", redoc_url="/redoc")
+app = FastAPI(title="StudyAbacus APIs", openapi_url=f"{settings.API_V1_STR}/openapi.json", docs_url="/docs", redoc_url="/redoc",
+              default_response_class=ORJSONResponse)
 
 
 # setup logger
-fileConfig('./app/logging.conf', disable_existing_loggers=False)
+setup_logging('./app/logging.conf')
 
 
 # get root logger
@@ -57,21 +65,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 # app.add_middleware(VerifyQuestionAttemptJWTMiddleware)
+app.add_middleware(RequestLogMiddleware)
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    idem = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    logger.info(f"rid={idem} start request path={request.url.path}")
-    start_time = time.time()
-   
-    response = await call_next(request)
-   
-    process_time = (time.time() - start_time) * 1000
-    formatted_process_time = '{0:.2f}'.format(process_time)
-    logger.info(f"rid={idem} completed_in={formatted_process_time}ms status_code={response.status_code}")
-   
-    return response
+
+@app.on_event("startup")
+async def startup():
+    # build this worker's engine and session factory once, before the first request
+    AsyncSessionDB()
+    ReplicaSessionDB()
+    AsyncRedis()
+
+    app.state.invalidation_subscriber = asyncio.create_task(invalidation.run_subscriber())
+    app.state.warmup_scheduler = asyncio.create_task(warmup.run_scheduler()) if warmup.lead_minutes() > 0 else None
+    app.state.answer_flusher = asyncio.create_task(answer_buffer.run_flusher()) if answer_buffer.enabled() else None
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in (app.state.invalidation_subscriber, app.state.warmup_scheduler):
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    if app.state.answer_flusher:
+        app.state.answer_flusher.cancel()
+        await asyncio.gather(app.state.answer_flusher, return_exceptions=True)
+        await answer_buffer.drain_all()
+    await dispose_async_engines()
+    await close_pool()
 
 
 
@@ -107,6 +128,21 @@ def health():
     return "StudyAbacus:: API Layer is healthy."
 
 
+@root_router.get("/health/cache", status_code=200)
+def cache_health():
+    return local_cache_stats()
+
+
+@root_router.get("/health/password_hash", status_code=200)
+def password_hash_health():
+    return password_pool_stats()
+
+
+@root_router.get("/health/logging", status_code=200)
+def logging_health():
+    return log_stats()
+
+
 @root_router.get("/favicon.ico", status_code=200)
 def favicon():
     return Response(content="", media_type="image/png")
@@ -37,9 +37,9 @@ class VerifyQuestionAttemptJWTMiddleware(BaseHTTPMiddleware):
             if query_exam_id in exam_ids:
                 raise HTTPException(status_code=403, detail="Exam ID mismatch")
 
-            cache = next(get_cache())
+            cache = get_cache()
 
-            exam_detail = cache.get(query_exam_id)
+            exam_detail = await cache.get(query_exam_id)
             if not exam_detail:
                 raise HTTPException(status_code=404, detail="Exam not found")
             
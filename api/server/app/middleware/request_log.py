@@ -0,0 +1,84 @@
+from contextvars import ContextVar
+from typing import Optional
+
+import itertools
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Fraction of requests logged, server errors are logged whatever the sample rate.
+SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 1.0))
+# Comma separated paths never logged, e.g. the load balancer health checks.
+EXCLUDE_PATHS = frozenset(path.strip() for path in os.environ.get(
+    'REQUEST_LOG_EXCLUDE', '/health,/health/cache,/health/password_hash,/health/logging,/favicon.ico').split(',') if path.strip())
+HEADER = b'x-request-id'
+
+# pid-counter is unique across the gunicorn workers and costs a counter increment per request
+_prefix = f'{os.getpid():x}-'
+_counter = itertools.count(1)
+request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+_record_factory = logging.getLogRecordFactory()
+
+
+def _log_record(*args, **kwargs) -> logging.LogRecord:
+    record = _record_factory(*args, **kwargs)
+    record.rid = request_id.get() or '-'
+    return record
+
+
+# every log record carries the id of the request it was emitted in, as %(rid)s
+logging.setLogRecordFactory(_log_record)
+
+
+def _next_request_id() -> str:
+    global _prefix
+    if not _prefix.startswith(f'{os.getpid():x}-'):
+        # forked after import, e.g. gunicorn --preload
+        _prefix = f'{os.getpid():x}-'
+    return f'{_prefix}{next(_counter):x}'
+
+
+class RequestLogMiddleware:
+    """
+    Logs one line per HTTP request, with its method, path, status code and duration, and
+    returns its request id in the x-request-id header.
+
+    A plain ASGI middleware, unlike @app.middleware("http") it does not wrap the request and
+    response in extra tasks and streams, so it costs next to nothing on unlogged requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        rid = _next_request_id()
+        token = request_id.set(rid)
+        path = scope['path']
+        logged = path not in EXCLUDE_PATHS and (SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE)
+        status_code = 500
+        start_time = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                message['headers'] = [*message.get('headers', ()), (HEADER, rid.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if logged or status_code >= 500:
+                process_time = (time.perf_counter() - start_time) * 1000
+                logger.info("method=%s path=%s completed_in=%.2fms status_code=%d", scope['method'], path, process_time,
+                            status_code, extra={'method': scope['method'], 'path': path, 'status_code': status_code,
+                                                'duration_ms': round(process_time, 2)})
+            request_id.reset(token)
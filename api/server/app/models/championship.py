@@ -1,5 +1,4 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean ,  Float
-from sqlalchemy.dialects.mysql import FLOAT
 
 from typing import Any
 
@@ -10,8 +9,8 @@ class Championship(Base):
     name = Column(String(100))
     reg_start_dt = Column(DateTime(timezone=True))
     reg_end_dt = Column(DateTime(timezone=True))
-    primary_price = Column(FLOAT(precision=10, scale=2))
-    secondary_price = Column(FLOAT(precision=10, scale=2))
+    primary_price = Column(Float(precision=10))
+    secondary_price = Column(Float(precision=10))
     active = Column(Boolean)
     max_exams =  Column(Integer, nullable =  True)
 
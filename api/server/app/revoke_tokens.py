@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+import logging
+
+
+from app.db.session import AsyncSessionDB, dispose_async_engines
+from app.db.redis import AsyncRedis, close_pool
+from app.services.admit_card import AdmitCardService
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+
+
+async def revoke(admit_card_ids) -> bool:
+    db = AsyncSessionDB().get_session()
+    try:
+        service = AdmitCardService(db, AsyncRedis().client)
+        ok = True
+        for admit_card_id in admit_card_ids:
+            result = await service.revoke_admit_card_tokens(admit_card_id)
+            if result.success:
+                logger.info("Revoked %s", result.value)
+            else:
+                ok = False
+                logger.error("Revocation failed %s", result.value)
+        return ok
+    finally:
+        await db.close()
+        await dispose_async_engines()
+        await close_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Revoke every token issued to admit cards, on all workers.")
+    parser.add_argument("admit_card_ids", nargs="+", type=int, help="admit cards whose tokens are revoked")
+    args = parser.parse_args()
+    if not asyncio.run(revoke(args.admit_card_ids)):
+        raise SystemExit(1)
+
+
+
+if __name__ == "__main__":
+    main()
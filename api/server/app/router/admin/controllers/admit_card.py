@@ -3,7 +3,8 @@ from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
 from app.utils.service_request import handle_result
-from app.schemas.admit_card import AdmitCardBase, AdmitCardCreate, AdmitCard, AdmitCardUpdate
+from app.schemas.admit_card import AdmitCardBase, AdmitCardCreate, AdmitCard, AdmitCardUpdate, AdmitCardList
+from app.utils.serializer import validated_response
 from app.services.admit_card import AdmitCardService
 
 from app.router import deps
@@ -14,12 +15,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=List[AdmitCard])
-async def read_admit_cards(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_session)):
+async def read_admit_cards(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve admit_cards.
     """
     result = await AdmitCardService(db).get_admit_cards( skip=skip, limit=limit)
-    return handle_result(result)
+    return validated_response(AdmitCardList, handle_result(result))
 
 @router.post("/{profile_id}", response_model=AdmitCard)
 async def create_admit_card(profile_id: int, admit_card: AdmitCardCreate, championship_id: int= Depends(deps.championship_id_param), examination_ids : List[int] = Depends(deps.examination_ids_param), db: Session = Depends(deps.get_session)):
@@ -30,7 +31,7 @@ async def create_admit_card(profile_id: int, admit_card: AdmitCardCreate, champi
     return handle_result(result)
 
 @router.get("/{admit_card_id}", response_model=AdmitCard)
-async def read_admit_card(admit_card_id: int, db: Session = Depends(deps.get_session)):
+async def read_admit_card(admit_card_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve admit_card.
     """
@@ -45,6 +46,14 @@ async def update_admit_card(admit_card_id: int, admit_card: AdmitCardUpdate,cham
     result = await AdmitCardService(db).update_admit_card(admit_card_id, admit_card, championship_id, examination_ids)
     return handle_result(result)
 
+@router.post("/{admit_card_id}/revoke_tokens")
+async def revoke_admit_card_tokens(admit_card_id: int, db: Session = Depends(deps.get_session), cache = Depends(deps.get_cache)):
+    """
+    Revoke every token issued to admit_card.
+    """
+    result = await AdmitCardService(db, cache).revoke_admit_card_tokens(admit_card_id)
+    return handle_result(result)
+
 @router.delete("/{admit_card_id}")
 async def delete_admit_card(admit_card_id: int, db: Session = Depends(deps.get_session)):
     """
@@ -55,42 +64,42 @@ async def delete_admit_card(admit_card_id: int, db: Session = Depends(deps.get_s
 
 
 @router.get("/profiles/{profile_id}/admit_cards", response_model=List[AdmitCard])
-async def read_profile_admit_cards(profile_id: int, db: Session = Depends(deps.get_session)):
+async def read_profile_admit_cards(profile_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve admit_cards for profile.
     """
     result = await AdmitCardService(db).get_profile_admit_cards(profile_id)
-    return handle_result(result)
+    return validated_response(AdmitCardList, handle_result(result))
 
 @router.get("/championships/{championship_id}/admit_cards", response_model=List[AdmitCard])
-async def read_championship_admit_cards(championship_id: int, db: Session = Depends(deps.get_session)):
+async def read_championship_admit_cards(championship_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve admit_cards for championship.
     """
     result = await AdmitCardService(db).get_championship_admit_cards(championship_id)
-    return handle_result(result)
+    return validated_response(AdmitCardList, handle_result(result))
 
 @router.get("/examinations/{examination_id}/admit_cards", response_model=List[AdmitCard])
-async def read_examination_admit_cards(examination_id: int, db: Session = Depends(deps.get_session)):
+async def read_examination_admit_cards(examination_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve admit_cards for examination.
     """
     result = await AdmitCardService(db).get_examination_admit_cards(examination_id)
-    return handle_result(result)
+    return validated_response(AdmitCardList, handle_result(result))
 
 @router.get("/{profile_id}/championship/{championship_id}/admit_cards", response_model=List[AdmitCard])
-async def read_profile_championship_admit_cards(profile_id: int, championship_id: int, db: Session = Depends(deps.get_session)):
+async def read_profile_championship_admit_cards(profile_id: int, championship_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve admit_cards for profile and championship.
     """
     result = await AdmitCardService(db).get_profile_championship_admit_cards(profile_id, championship_id)
-    return handle_result(result)
+    return validated_response(AdmitCardList, handle_result(result))
 
 @router.get("/{profile_id}/examination/{examination_id}/admit_cards", response_model=List[AdmitCard])
-async def read_profile_examination_admit_cards(profile_id: int, examination_id: int, db: Session = Depends(deps.get_session)):
+async def read_profile_examination_admit_cards(profile_id: int, examination_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve admit_cards for profile and examination.
     """
     result = await AdmitCardService(db).get_profile_examination_admit_cards(profile_id, examination_id)
-    return handle_result(result)
+    return validated_response(AdmitCardList, handle_result(result))
 
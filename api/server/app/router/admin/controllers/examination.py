@@ -25,7 +25,7 @@ async def create_examination(championship_id: int, examination: ExaminationCreat
     return handle_result(result)
 
 @router.get("/{examination_id}", response_model=Examination)
-async def read_examination(examination_id: int, db: Session = Depends(deps.get_session)):
+async def read_examination(examination_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve examination.
     """
@@ -3,7 +3,8 @@ from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
 from app.utils.service_request import handle_result
-from app.schemas.question import QuestionBase, QuestionCreate, Question, QuestionUpdate
+from app.schemas.question import QuestionBase, QuestionCreate, Question, QuestionUpdate, QuestionList
+from app.utils.serializer import validated_response
 from app.services.question import QuestionService
 
 from app.router import deps
@@ -23,7 +24,7 @@ async def create_question(examination_id: int, question: QuestionCreate, db: Ses
     return handle_result(result)
 
 @router.get("/{question_id}", response_model=Question)
-async def read_question(question_id: int, db: Session = Depends(deps.get_session)):
+async def read_question(question_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve question.
     """
@@ -48,9 +49,9 @@ async def delete_question(question_id: int, db: Session = Depends(deps.get_sessi
 
 
 @router.get("/{examination_id}/questions", response_model=List[Question])
-async def read_examination_questions(examination_id: int, db: Session = Depends(deps.get_session)):
+async def read_examination_questions(examination_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve questions for examination.
     """
     result = await QuestionService(db).get_examination_questions(examination_id)
-    return handle_result(result)
+    return validated_response(QuestionList, handle_result(result))
@@ -1,14 +1,14 @@
 from fastapi import Query, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from app.utils.app_exceptions import AppException
-from typing import Optional, Generator
+from typing import Optional, Generator, AsyncGenerator
 
 
-from app.db.session import SessionDB
-from app.db.redis import Redis
+from app.db.session import AsyncSessionDB, ReplicaSessionDB
+from app.db.redis import AsyncRedis
 from app.utils.service_request import ServiceResult
-from app.services.examination import ExaminationCRUD
-from app.services.exam_attempt import ExamAttemptCRUD
+from app.services.exam_gate import ExamGate
+from app.services.admit_card_token import AdmitCardToken
 from app.utils.jwt import decode_jwt_token
 
 
@@ -25,31 +25,48 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 logger = logging.getLogger(__name__)
 
 
-def get_session() -> Generator:
-    db = SessionDB()
+async def get_session() -> AsyncGenerator:
+    db = AsyncSessionDB()
     db_session = db.get_session()
     if db_session is None:
         raise ValueError("DB Session is not set. Please check the configuration.")
     try:
         yield db_session
-        # db_session.commit()  
+        # await db_session.commit()  
     except:
-        db_session.rollback()  
+        await db_session.rollback()  
         raise
     finally:
-        db_session.close()  
+        await db_session.close()  
+
+
+async def get_read_session() -> AsyncGenerator:
+    """
+    Session for read-only endpoints: the replica when one is configured and fresh, the primary otherwise.
+    Endpoints that must read their own writes should keep using get_session.
+    """
+    replica = ReplicaSessionDB()
+    if await replica.is_fresh():
+        db_session = replica.get_session()
+    else:
+        db_session = AsyncSessionDB().get_session()
+    try:
+        yield db_session
+    except:
+        await db_session.rollback()
+        raise
+    finally:
+        await db_session.close()
 
 
 
-def get_cache() -> Generator:
-    cache = Redis()
+def get_cache():
+    # clients share the worker's connection pool, so there is nothing to close per request
+    cache = AsyncRedis()
     cache_client = cache.client
     if cache_client is None:
         raise ValueError("Cache client is not set. Please check the configuration.")
-    try:
-        yield cache_client
-    finally:
-        cache_client.close()
+    return cache_client
 
 
 
@@ -106,21 +123,30 @@ def get_order(championship_id: int , examination_ids: str = Query(None, descript
     except Exception as e:
         return None
     
-def get_admit_card(token: str = Depends(oauth2_scheme)):
+async def get_token_payload(token: str = Depends(oauth2_scheme), cache = Depends(get_cache)) -> Optional[dict]:
+    """
+    Claims of the bearer token (sub, exams, ver), None when it is invalid or revoked.
+    FastAPI resolves it once per request, however many dependencies of the endpoint use it.
+    """
     try:
-        return decode_jwt_token(token)
+        return await AdmitCardToken(None, cache).verify(token)
     except Exception as e:
+        logger.error("Error decoding JWT: %s", e)
         return None
 
-async def valid_attempt(examination_id: int,token: str = Depends(oauth2_scheme)):
-    try:
-        payload = decode_jwt_token(token)
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"JWT token invalid: {e}")
+async def get_admit_card(payload: Optional[dict] = Depends(get_token_payload), db = Depends(get_session), cache = Depends(get_cache)):
+    # the token only names the admit card, its row comes from the cache
+    if payload is None:
+        raise HTTPException(status_code=401, detail="JWT token invalid")
+    return await AdmitCardToken(db, cache).admit_card(int(payload['sub']))
+
+async def valid_attempt(examination_id: int, payload: Optional[dict] = Depends(get_token_payload)):
+    if payload is None:
+        raise HTTPException(status_code=401, detail="JWT token invalid")
     
     try:
 
-        exam_ids = payload["examination_ids"]
+        exam_ids = payload["exams"]
         current_time = datetime.utcnow()
         expiration_time = payload.get("exp")
         if expiration_time and expiration_time < current_time.timestamp():
@@ -134,7 +160,7 @@ async def valid_attempt(examination_id: int,token: str = Depends(oauth2_scheme))
             raise HTTPException(status_code=403, detail="Exam ID mismatch")
 
         return {
-            "admit_card_id" : payload['id'],
+            "admit_card_id" : int(payload['sub']),
             "examination_id" :examination_id,
             "admit_card" : payload
         }
@@ -143,29 +169,15 @@ async def valid_attempt(examination_id: int,token: str = Depends(oauth2_scheme))
         logger.error("JWT expired")
         raise HTTPException(status_code=401, detail="Token has expired")
     except JWTError as e:
-        logger.error(f"Error decoding JWT: {str(e)}")
+        logger.error("Error decoding JWT: %s", e)
         raise HTTPException(status_code=401, detail="Unauthorized")
     except (ValueError, TypeError) as e:
-        logger.error(f"Error parsing user ID from JWT: {str(e)}")
+        logger.error("Error parsing user ID from JWT: %s", e)
         raise HTTPException(status_code=400, detail="Invalid user ID format")
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 async def valid_exam(examination_id: int, admit_card_id: int, db, cache):
-    if admit_card_id == 1000:
-        exam_attempt = await ExamAttemptCRUD(db, cache).get_create(examination_id, admit_card_id)
-        if exam_attempt.is_submitted:
-            return ServiceResult(AppException.ExamSubmitted({'ERROR': 'Examination has already been submitted!'}))
-        return
-    
-    exam_details = await ExaminationCRUD(db, cache).get(examination_id)
-    
-    if datetime.now(pytz.utc) < exam_details.exam_start_dt:
-        return ServiceResult(AppException.ExaminationNotStarted({'ERROR': 'Examination has not started yet!'}))
-    
-    exam_attempt = await ExamAttemptCRUD(db, cache).get_create(examination_id, admit_card_id)
-    
-    if exam_attempt.is_submitted:
-        return ServiceResult(AppException.ExamSubmitted({'ERROR': 'Examination has already been submitted!'}))
+    return await ExamGate(db, cache).check(examination_id, admit_card_id)
         
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
@@ -16,11 +16,11 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/authenticate/")
-async def authenticate_admit_card(admit_card: AdmitCardAuthenticateBase, db: Session = Depends(deps.get_session)):
+async def authenticate_admit_card(admit_card: AdmitCardAuthenticateBase, request: Request, db: Session = Depends(deps.get_session), cache = Depends(deps.get_cache)):
     """
     Authenticate admit_card.
     """
-    result = await AdmitCardService(db).authenticate_admit_card(admit_card)
+    result = await AdmitCardService(db, cache).authenticate_admit_card(admit_card, request.client.host if request.client else None)
     return handle_result(result)
 
 
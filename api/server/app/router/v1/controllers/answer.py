@@ -3,7 +3,8 @@ from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
 from app.utils.service_request import handle_result
-from app.schemas.answer import AnswerBase, AnswerCreate, Answer, AnswerUpdate
+from app.schemas.answer import AnswerBase, AnswerCreate, Answer, AnswerUpdate, AnswerList
+from app.utils.serializer import validated_response
 from app.services.answer import AnswerService
 
 from app.router import deps
@@ -14,12 +15,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=List[Answer])
-async def read_answers(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_session)):
+async def read_answers(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve answers.
     """
     result = await AnswerService(db).get_answers( skip=skip, limit=limit)
-    return handle_result(result)
+    return validated_response(AnswerList, handle_result(result))
 
 @router.post("/{question_id}", response_model=Answer)
 async def create_answer(question_id: int, answer: AnswerCreate, db: Session = Depends(deps.get_session)):
@@ -30,7 +31,7 @@ async def create_answer(question_id: int, answer: AnswerCreate, db: Session = De
     return handle_result(result)
 
 @router.get("/{answer_id}", response_model=Answer)
-async def read_answer(answer_id: int, db: Session = Depends(deps.get_session)):
+async def read_answer(answer_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve answer.
     """
@@ -54,9 +55,9 @@ async def delete_answer(answer_id: int, db: Session = Depends(deps.get_session))
     return handle_result(result)
 
 @router.get("/{question_id}/answers", response_model=List[Answer])
-async def read_question_answers(question_id: int, db: Session = Depends(deps.get_session)):
+async def read_question_answers(question_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve answers for question.
     """
     result = await AnswerService(db).get_question_answers(question_id)
-    return handle_result(result)
\ No newline at end of file
+    return validated_response(AnswerList, handle_result(result))
\ No newline at end of file
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
 
 from app.utils.service_request import handle_result
-from app.schemas.championship import ChampionshipBase, ChampionshipCreate, Championship, ChampionshipUpdate
+from app.schemas.championship import ChampionshipBase, ChampionshipCreate, Championship, ChampionshipUpdate, ChampionshipList
+from app.utils.serializer import validated_response
 from app.services.championship import ChampionshipService
 
 
 from app.router import deps
+from app.utils import cache_control
 import logging
 
 
@@ -19,16 +21,17 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[Championship])
-async def read_championships(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_session)):
+async def read_championships(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_read_session), cache = Depends(deps.get_cache)):
     """
     Retrieve championships.
     """
-    result = await ChampionshipService(db).get_championships( skip=skip, limit=limit)
-    return handle_result(result)
+    result = await ChampionshipService(db, cache).get_championships( skip=skip, limit=limit)
+    championships = handle_result(result)
+    return validated_response(ChampionshipList, championships, headers={"Cache-Control": cache_control.catalogue()})
 
 
 @router.get("/{championship_id}/", response_model=Championship)
-async def read_championship(championship_id: int, db: Session = Depends(deps.get_session)):
+async def read_championship(championship_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve championship.
     """
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
 
 from app.utils.service_request import handle_result
-from app.schemas.examination import ExaminationAttempts, ExaminationCreate, Examination, ExaminationUpdate
+from app.schemas.examination import ExaminationAttempts, ExaminationCreate, Examination, ExaminationUpdate, ExaminationList
 from app.services.examination import ExaminationService
 from app.services.exam_attempt import ExamAttemptCRUD
 
 from app.router import deps
+from app.utils.etag import digest, make_etag, not_modified
+from app.utils import cache_control
+from app.utils import serializer
+from app.utils.serializer import validated_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,21 +20,28 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=List[Examination])
-async def read_examinations_for_championship(championship_id:int , skip: int = 0, limit: int = 100,  db: Session = Depends(deps.get_session)):
+async def read_examinations_for_championship(championship_id:int , skip: int = 0, limit: int = 100,  db: Session = Depends(deps.get_read_session), cache = Depends(deps.get_cache)):
     """
     Retrieve examinations for championship.
     """
-    result = await ExaminationService(db).get_championship_examinations(championship_id, skip=skip, limit=limit)
-    return handle_result(result)
+    result = await ExaminationService(db, cache).get_championship_examinations(championship_id, skip=skip, limit=limit)
+    examinations = handle_result(result)
+    return validated_response(ExaminationList, examinations, headers={"Cache-Control": cache_control.catalogue()})
 
 
 @router.get("/{examination_id}/", response_model=ExaminationAttempts)
-async def read_examination(examination_id: int, db: Session = Depends(deps.get_session), cache = Depends(deps.get_cache), payload : dict = Depends(deps.valid_attempt)):
+async def read_examination(examination_id: int, request: Request, response: Response, db: Session = Depends(deps.get_session), cache = Depends(deps.get_cache), payload : dict = Depends(deps.valid_attempt)):
     """
     Retrieve examination.
     """
     result = await ExaminationService(db, cache).get_examination(examination_id, payload['admit_card_id'] )
-    return handle_result(result)
+    examination = handle_result(result)
+    # the examination and the attempt both come from the caches, hashing the small result is the version
+    etag = make_etag(digest(serializer.dumps(examination, sort_keys=True)))
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return examination
 
 @router.post("/{examination_id}/submit", status_code=status.HTTP_201_CREATED)
 async def submit_exam(examination_id:int, db: Session = Depends(deps.get_session), cache = Depends(deps.get_cache), payload : dict = Depends(deps.valid_attempt)):
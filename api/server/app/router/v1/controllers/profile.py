@@ -3,7 +3,8 @@ from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
 from app.utils.service_request import handle_result
-from app.schemas.profile import ProfileBase, ProfileCreate, Profile, ProfileUpdate
+from app.schemas.profile import ProfileBase, ProfileCreate, Profile, ProfileUpdate, ProfileList
+from app.utils.serializer import validated_response
 from app.services.profile import ProfileService
 
 from app.router import deps
@@ -14,15 +15,15 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=List[Profile])
-async def read_profiles(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_session)):
+async def read_profiles(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve profiles.
     """
     result = await ProfileService(db).get_profiles( skip=skip, limit=limit)
-    return handle_result(result)
+    return validated_response(ProfileList, handle_result(result))
 
 @router.get("/{profile_id}", response_model=Profile)
-async def read_profile(profile_id: int, db: Session = Depends(deps.get_session)):
+async def read_profile(profile_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve profile.
     """
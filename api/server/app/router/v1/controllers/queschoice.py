@@ -3,7 +3,8 @@ from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
 from app.utils.service_request import handle_result
-from app.schemas.queschoice import QuesChoiceBase, QuesChoiceCreate, QuesChoice, QuesChoiceUpdate
+from app.schemas.queschoice import QuesChoiceBase, QuesChoiceCreate, QuesChoice, QuesChoiceUpdate, QuesChoiceList
+from app.utils.serializer import validated_response
 from app.services.queschoice import QuesChoiceService
 
 from app.router import deps
@@ -14,12 +15,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=List[QuesChoice])
-async def read_queschoices(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_session)):
+async def read_queschoices(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve queschoices.
     """
     result = await QuesChoiceService(db).get_queschoices( skip=skip, limit=limit)
-    return handle_result(result)
+    return validated_response(QuesChoiceList, handle_result(result))
 
 @router.post("/{question_id}", response_model=QuesChoice)
 async def create_queschoice(question_id: int, queschoice: QuesChoiceCreate, db: Session = Depends(deps.get_session)):
@@ -30,7 +31,7 @@ async def create_queschoice(question_id: int, queschoice: QuesChoiceCreate, db:
     return handle_result(result)
 
 @router.get("/{queschoice_id}", response_model=QuesChoice)
-async def read_queschoice(queschoice_id: int, db: Session = Depends(deps.get_session)):
+async def read_queschoice(queschoice_id: int, db: Session = Depends(deps.get_read_session)):
     """
     Retrieve queschoice.
     """
@@ -54,9 +55,9 @@ async def delete_queschoice(queschoice_id: int, db: Session = Depends(deps.get_s
     return handle_result(result)
 
 @router.get("/{question_id}/queschoices", response_model=List[QuesChoice])
-async def read_question_queschoices(question_id: int, db: Session = Depends(deps.get_session)):
+async def read_question_queschoices(question_id: int, cache = Depends(deps.get_cache), db: Session = Depends(deps.get_read_session)):
     """
     Retrieve queschoices for question.
     """
-    result = await QuesChoiceService(db).get_queschoices_by_question(question_id)
-    return handle_result(result)
\ No newline at end of file
+    result = await QuesChoiceService(db, cache).get_queschoices_by_question(question_id)
+    return validated_response(QuesChoiceList, handle_result(result))
\ No newline at end of file
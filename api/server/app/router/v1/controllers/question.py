@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List, Any , Optional, Union
 from sqlalchemy.orm import Session
 
 from app.utils.service_request import handle_result
-from app.schemas.question import QuestionBase, QuestionAuth, Question, QuestionUpdate
+from app.schemas.question import QuestionBase, QuestionAuth, Question, QuestionUpdate, QuestionAnswer, QuestionAuthList
+from app.utils.serializer import validated_response
 from app.services.question import QuestionService
 from app.services.examination import ExaminationCRUD
 from app.services.exam_attempt import ExamAttemptCRUD
 
 
 from app.router import deps
+from app.utils.etag import not_modified
 import logging
 from datetime import datetime
 
@@ -19,15 +21,20 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[QuestionAuth])
-async def read_questions( cache = Depends(deps.get_cache), db: Session = Depends(deps.get_session),  payload : dict = Depends(deps.valid_attempt)):
+async def read_questions(request: Request, cache = Depends(deps.get_cache), db: Session = Depends(deps.get_session),  payload : dict = Depends(deps.valid_attempt)):
     """
     Retrieve questions.
     """
     err = await deps.valid_exam(payload["examination_id"], payload['admit_card_id'], db, cache)
     if err:
         return handle_result(err)
-    questions = await QuestionService(db, cache).get_examination_questions(payload["examination_id"], payload['admit_card_id'])
-    return handle_result(questions)
+    # taken before the body, so an answer written meanwhile can only make the ETag older than the body
+    etag = handle_result(await QuestionService(db, cache).get_examination_questions_etag(payload["examination_id"], payload['admit_card_id']))
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    # the body is already encoded QuestionAuth items, returning a Response skips re-validating them
+    questions = await QuestionService(db, cache).get_examination_questions_json(payload["examination_id"], payload['admit_card_id'])
+    return Response(content=handle_result(questions), media_type="application/json", headers={"ETag": etag})
 
 @router.get("/{question_id}", response_model=QuestionAuth)
 async def read_question(question_id: int, cache = Depends(deps.get_cache), db: Session = Depends(deps.get_session),  payload : dict = Depends(deps.valid_attempt)):
@@ -42,6 +49,18 @@ async def read_question(question_id: int, cache = Depends(deps.get_cache), db: S
     return handle_result(result)
 
 
+@router.put("/bulk", response_model=List[QuestionAuth])
+async def answer_questions(answers: List[QuestionAnswer], cache = Depends(deps.get_cache), db: Session = Depends(deps.get_session),  payload : dict = Depends(deps.valid_attempt)):
+    """
+    Answer several questions at once.
+    """
+    err = await deps.valid_exam(payload["examination_id"], payload['admit_card_id'], db, cache)
+    if err:
+        return handle_result(err)
+    result = await QuestionService(db, cache).answer_questions(payload["examination_id"], payload['admit_card_id'], answers)
+    return validated_response(QuestionAuthList, handle_result(result))
+
+
 @router.put("/{question_id}", response_model=QuestionAuth)
 async def answer_question(question_id: int, question: QuestionUpdate, cache = Depends(deps.get_cache), db: Session = Depends(deps.get_session),  payload : dict = Depends(deps.valid_attempt)):
     """
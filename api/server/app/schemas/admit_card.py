@@ -1,26 +1,25 @@
-from pydantic import BaseModel , Field , validator
+from pydantic import BaseModel , ConfigDict, Field , TypeAdapter
 from typing import List, Any , Optional, Union, ClassVar
 
 class AdmitCardBase(BaseModel):
     order_id: str
-    password : Optional[str]
+    password : Optional[str] = None
     examination_ids : List[int]
     championship_id : int
-    
+
 
 class AdmitCardCreateManual(BaseModel):
     order_id: str
     password : str
-    
+
 class AdmitCardCreate(AdmitCardBase):
     pass
 
 class AdmitCard(AdmitCardBase):
     id: int
-    profile_id: int    
+    profile_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AdmitCardUpdate(AdmitCardBase):
     pass
@@ -30,5 +29,11 @@ class AdmitCardAuthenticateBase(BaseModel):
     id: int
     password : str
 
+    # numeric passwords sent as JSON numbers
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
 class AdmitCardAuthenticate(BaseModel):
-    jwt : str
\ No newline at end of file
+    jwt : str
+
+
+AdmitCardList = TypeAdapter(List[AdmitCard])
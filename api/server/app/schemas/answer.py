@@ -1,14 +1,14 @@
 from typing import List, Any , Optional, Union, ClassVar
-from pydantic import BaseModel, validator, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 class AnswerBase(BaseModel):
     value: str
 
-    schema_extra: ClassVar = {
+    model_config = ConfigDict(json_schema_extra={
         "example": {
             "value": "Answer Value"
         }
-    }
+    })
 
 class AnswerCreate(AnswerBase):
     pass
@@ -17,8 +17,10 @@ class Answer(AnswerBase):
     id: int
     question_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AnswerUpdate(AnswerBase):
     pass
+
+
+AnswerList = TypeAdapter(List[Answer])
@@ -1,5 +1,5 @@
 from typing import List, Any , Optional, Union, ClassVar
-from pydantic import BaseModel, validator, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 
 from datetime import datetime
 
@@ -7,16 +7,17 @@ class ChampionshipBase(BaseModel):
     name: str
     reg_start_dt: datetime
     reg_end_dt: datetime
-    primary_price: float = Field(..., description="Primary price", example=100.00, gt=0) #validation for price >0
-    secondary_price: float = Field(..., description="Secondary price", example=50.00, gt=0) #validation for price >0
+    primary_price: float = Field(..., description="Primary price", examples=[100.00], gt=0) #validation for price >0
+    secondary_price: float = Field(..., description="Secondary price", examples=[50.00], gt=0) #validation for price >0
     active: bool = True
     max_exams:int
 
-    @validator('primary_price', 'secondary_price', pre=True)
+    @field_validator('primary_price', 'secondary_price', mode='before')
+    @classmethod
     def format_price(cls, value):
         return "{:.2f}".format(value)
 
-    schema_extra: ClassVar = {
+    model_config = ConfigDict(json_schema_extra={
         "example": {
             "name": "Championship Name",
             "reg_start_dt": "2021-01-01T00:00:00",
@@ -25,7 +26,7 @@ class ChampionshipBase(BaseModel):
             "secondary_price": "50.00",
             "active": True
         }
-    }
+    })
 
 class ChampionshipCreate(ChampionshipBase):
     pass
@@ -33,8 +34,10 @@ class ChampionshipCreate(ChampionshipBase):
 class Championship(ChampionshipBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ChampionshipUpdate(ChampionshipBase):
-    pass
\ No newline at end of file
+    pass
+
+
+ChampionshipList = TypeAdapter(List[Championship])
@@ -1,5 +1,5 @@
 from typing import List, Any , Optional, Union, ClassVar
-from pydantic import BaseModel, validator, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 from datetime import datetime
 
@@ -10,7 +10,7 @@ class ExaminationBase(BaseModel):
     exam_start_dt: datetime
     exam_end_dt: datetime
 
-    schema_extra: ClassVar = {
+    model_config = ConfigDict(json_schema_extra={
         "example": {
             "name": "Examination Name",
             "code": "EXAM001",
@@ -18,7 +18,7 @@ class ExaminationBase(BaseModel):
             "exam_start_dt": "2021-01-01T00:00:00",
             "exam_end_dt": "2021-01-01T00:00:00"
         }
-    }
+    })
 
 
 class ExaminationCreate(ExaminationBase):
@@ -28,7 +28,7 @@ class ExaminationCreate(ExaminationBase):
     exam_start_dt: datetime
     exam_end_dt: datetime
 
-    schema_extra: ClassVar = {
+    model_config = ConfigDict(json_schema_extra={
         "example": {
             "name": "Examination Name",
             "code": "EXAM001",
@@ -36,15 +36,14 @@ class ExaminationCreate(ExaminationBase):
             "exam_start_dt": "2021-01-01T00:00:00",
             "exam_end_dt": "2021-01-01T00:00:00"
         }
-    }
+    })
 
 class Examination(ExaminationBase):
     id: int
     championship_id: int
 
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ExaminationAttempts(ExaminationBase):
     id: int
@@ -52,8 +51,10 @@ class ExaminationAttempts(ExaminationBase):
     is_submitted : bool
 
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ExaminationUpdate(ExaminationBase):
-    pass
\ No newline at end of file
+    pass
+
+
+ExaminationList = TypeAdapter(List[Examination])
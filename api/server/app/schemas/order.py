@@ -1,10 +1,10 @@
 from typing import List, Any , Optional, Union, ClassVar
-from pydantic import BaseModel, validator, Field
+from pydantic import BaseModel, Field
 
 class OrderBase(BaseModel):
-    amount : float = Field(..., description="Amount", example=100.00, gt=0) #validation for price >0
-    currency : str = Field(..., description="Currency", example="USD")
-    order_id : str = Field(..., description="Order ID", example="order_123")
+    amount : float = Field(..., description="Amount", examples=[100.00], gt=0) #validation for price >0
+    currency : str = Field(..., description="Currency", examples=["USD"])
+    order_id : str = Field(..., description="Order ID", examples=["order_123"])
 
 class OrderCreate(BaseModel):
     championship_id: int
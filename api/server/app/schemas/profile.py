@@ -1,20 +1,20 @@
 from typing import List, Any , Optional, Union, ClassVar
-from pydantic import BaseModel, validator,  root_validator
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationInfo, field_validator, model_validator
 from fastapi import HTTPException
 from app.utils.app_exceptions  import AppException
 from datetime import datetime
 import phonenumbers
 
 class ProfileBase(BaseModel):
-    name: Optional[str]
-    ci : Optional[str]
-    sa_class : Optional[int]
-    city : Optional[str]
-    country : Optional[str]
-    age : Optional[int]
-    guardian_name: Optional[str]
-    email: Optional[str]
-    phone: Optional[str]
+    name: Optional[str] = None
+    ci : Optional[str] = None
+    sa_class : Optional[int] = None
+    city : Optional[str] = None
+    country : Optional[str] = None
+    age : Optional[int] = None
+    guardian_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
 
 
 class ProfileOrderCreate(BaseModel):
@@ -23,15 +23,20 @@ class ProfileOrderCreate(BaseModel):
     country_code : Optional[str] =None
     phone: Optional[str] =None
 
-    @validator('phone', pre=True)
-    def validate_phone_number(cls, v, values, field):
+    # phone numbers and country codes sent as JSON numbers
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    @field_validator('phone', mode='before')
+    @classmethod
+    def validate_phone_number(cls, v, info: ValidationInfo):
         if v is None:
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
 
-        country_code = values.get('country_code')
+        country_code = info.data.get('country_code')
         if country_code is None:
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
 
+        v = str(v)
         # Check if the phone number has exactly 10 digits
         if len(v) != 10:
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
@@ -46,44 +51,46 @@ class ProfileOrderCreate(BaseModel):
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
 
         return v
-    
-    @validator('email', pre=True)
-    def validate_email(cls,v, values, field):
+
+    @field_validator('email', mode='before')
+    @classmethod
+    def validate_email(cls, v):
         if v is None:
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
         if len(v) == 0:
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
-        
+
         return v
-    
-    @validator('name', pre=True)
-    def validate_name(cls,v, values, field):
+
+    @field_validator('name', mode='before')
+    @classmethod
+    def validate_name(cls, v):
         if v is None:
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
         if len(v) == 0:
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
-        
+
         return v
 
-    @root_validator
-    def check_name_or_email(cls, values):
-        name = values.get('name')
-        email = values.get('email')
-        if not name and not email:
+    @model_validator(mode='after')
+    def check_name_or_email(self):
+        if not self.name and not self.email:
             raise AppException.RequestOrderCreateItem({"ERROR": "Please Check Your Details"})
-        return values
-    
+        return self
+
+
 
 
-    
 class ProfileCreate(ProfileBase):
     pass
 
 class Profile(ProfileBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ProfileUpdate(ProfileBase):
     pass
+
+
+ProfileList = TypeAdapter(List[Profile])
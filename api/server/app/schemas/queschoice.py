@@ -1,16 +1,16 @@
 from typing import List, Any , Optional, Union, ClassVar
-from pydantic import BaseModel, validator, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 class QuesChoiceBase(BaseModel):
     label: str
     value: str
 
-    schema_extra: ClassVar = {
+    model_config = ConfigDict(json_schema_extra={
         "example": {
             "label": "Choice Label",
             "value": "Choice Value"
         }
-    }
+    })
 
 class QuesChoiceCreate(QuesChoiceBase):
     pass
@@ -18,8 +18,10 @@ class QuesChoiceCreate(QuesChoiceBase):
 class QuesChoice(QuesChoiceBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class QuesChoiceUpdate(QuesChoiceBase):
-    pass
\ No newline at end of file
+    pass
+
+
+QuesChoiceList = TypeAdapter(List[QuesChoice])
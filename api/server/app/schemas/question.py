@@ -1,5 +1,5 @@
 from typing import List, Any , Optional, Union, ClassVar
-from pydantic import BaseModel, validator, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 from datetime import datetime
 
@@ -8,13 +8,13 @@ class QuestionBase(BaseModel):
     title: str
     description: str
 
-    schema_extra: ClassVar = {
+    model_config = ConfigDict(json_schema_extra={
         "example": {
             "questype": "Question Type",
             "title": "Question Title",
             "description": "Question Description"
         }
-    }
+    })
 
 class QuestionCreate(QuestionBase):
     pass
@@ -22,12 +22,17 @@ class QuestionCreate(QuestionBase):
 class Question(QuestionBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class QuestionUpdate(BaseModel):
     answer : str
-    
+
+    # numeric answers sent as JSON numbers
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+class QuestionAnswer(QuestionUpdate):
+    question_id : int
+
 
 class QuestionAuth(BaseModel):
     id: int
@@ -35,7 +40,10 @@ class QuestionAuth(BaseModel):
     description: str
     questype: str
     examination_id : int
-    answer: Optional[Union[str, None]]
+    answer: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 
-    class Config:
-        orm_mode = True
+QuestionList = TypeAdapter(List[Question])
+QuestionAuthList = TypeAdapter(List[QuestionAuth])
@@ -2,8 +2,11 @@ from app.utils.app_exceptions import AppException
 
 from app.services.main import AppService, AppCRUD
 from app.utils.service_request import ServiceResult
-from app.utils.hash import hash_password
-from app.utils.jwt import create_jwt_token
+from app.utils.password import check_password, make_password_hash
+from app.services.login_throttle import LoginThrottle
+from app.db.redis import AsyncRedis
+from app.services.admit_card_token import AdmitCardToken
+from app.db.invalidation import invalidate
 
 from app.models.admit_card import AdmitCard as AdmitCardModel
 from app.schemas.admit_card import(
@@ -14,7 +17,7 @@ from app.schemas.admit_card import(
 from app.schemas.profile import ProfileUpdate
 from app.services.profile import ProfileCRUD
 
-from sqlalchemy import asc, desc, and_
+from sqlalchemy import asc, desc, and_, select, update
 from typing import List, Any , Optional, Union
 
 import logging
@@ -33,7 +36,7 @@ class AdmitCardService(AppService):
             result = await ProfileCRUD(self.db).get( admit_card['profile_id'])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_card: {str(e)}')
+            logger.error('Error retrieving admit_card: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_card: {str(e)}"}))
 
     async def update_current_admit_card(self,profile:ProfileUpdate, admit_card: dict) -> ServiceResult:
@@ -44,27 +47,44 @@ class AdmitCardService(AppService):
             profile = await ProfileCRUD(self.db).update(admit_card['profile_id'], profile)
             return ServiceResult(profile)
         except Exception as e:
-            logger.error(f'Error updating admit_card: {str(e)}')
+            logger.error('Error updating admit_card: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating admit_card: {str(e)}"}))
     
-    async def authenticate_admit_card(self, admit_card: AdmitCardAuthenticateBase) -> ServiceResult:
+    async def authenticate_admit_card(self, admit_card: AdmitCardAuthenticateBase, client_ip: Optional[str] = None) -> ServiceResult:
         """
         Authenticate admit_card.
         """
         try:
-            _admit_card = (await AdmitCardCRUD(self.db).get(AdmitCardModel, admit_card.id)).__dict__
-            hashed_password = await hash_password(admit_card.password)
-            if _admit_card['password_hash'] == hashed_password:
-                _admit_card['password_hash'] = None
-                _admit_card['_sa_instance_state'] = None
-                token = create_jwt_token(_admit_card)
+            throttle = LoginThrottle(self.db, self.cache)
+            err = await throttle.check(admit_card.id, client_ip)
+            if err:
+                return err
+
+            record = await AdmitCardCRUD(self.db).get(AdmitCardModel, admit_card.id)
+            if record is None:
+                await throttle.mark_unknown(admit_card.id)
+                return ServiceResult(AppException.RequestAuthenticateItem( {"ERROR": "Invalid password"}))
+            valid, needs_rehash = await check_password(admit_card.password, record.password_hash)
+            if valid:
+                # the token only names the admit card and its exams, the rest is looked up when needed
+                token = await AdmitCardToken(self.db, self.cache).issue(record.id, record.examination_ids)
+                if needs_rehash:
+                    await self._rehash_password(admit_card.id, admit_card.password)
                 return ServiceResult({"jwt": token})
             else:
+                await throttle.charge_failure(admit_card.id, client_ip)
                 return ServiceResult(AppException.RequestAuthenticateItem( {"ERROR": "Invalid password"}))
         except Exception as e:
-            logger.error(f'Error authenticating admit_card: {str(e)}')
+            logger.error('Error authenticating admit_card: %s', e)
             return ServiceResult(AppException.RequestAuthenticateItem( {"ERROR": f"Error authenticating admit_card: {str(e)}"}))
 
+    async def _rehash_password(self, admit_card_id: int, password: str) -> None:
+        # the login already succeeded, a failed upgrade is retried on the next one
+        try:
+            await AdmitCardCRUD(self.db).update_password_hash(AdmitCardModel, admit_card_id, await make_password_hash(password))
+        except Exception as e:
+            logger.error('Error upgrading password hash of admit_card %s: %s', admit_card_id, e)
+
     async def get_admit_cards(self, skip: int = 0, limit: int = 100) -> ServiceResult:
         """
         Retrieve admit_cards.
@@ -73,7 +93,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get_all(AdmitCardModel, skip=skip, limit=limit)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_cards: {str(e)}')
+            logger.error('Error retrieving admit_cards: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_cards: {str(e)}"}))
 
     async def create_admit_card(self, profile_id: int, championship_id: int, examination_ids: List[int], admit_card: AdmitCardCreateSchema) -> ServiceResult:
@@ -84,7 +104,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).create( profile_id, championship_id, examination_ids, admit_card)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error creating admit_card: {str(e)}')
+            logger.error('Error creating admit_card: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating admit_card: {str(e)}"}))
 
     async def get_admit_card(self, admit_card_id: int) -> ServiceResult:
@@ -95,7 +115,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get(AdmitCardModel, admit_card_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_card: {str(e)}')
+            logger.error('Error retrieving admit_card: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_card: {str(e)}"}))
     
     async def update_admit_card(self, admit_card_id: int, admit_card: AdmitCardSchema, championship_id: int, examination_ids: List[int]) -> ServiceResult:
@@ -106,9 +126,20 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).update(AdmitCardModel, admit_card_id, admit_card, championship_id, examination_ids)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error updating admit_card: {str(e)}')
+            logger.error('Error updating admit_card: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating admit_card: {str(e)}"}))
 
+    async def revoke_admit_card_tokens(self, admit_card_id: int) -> ServiceResult:
+        """
+        Revoke every token issued to an admit_card.
+        """
+        try:
+            version = await AdmitCardToken(self.db, self.cache).revoke(admit_card_id)
+            return ServiceResult({'admit_card_id': admit_card_id, 'token_version': version})
+        except Exception as e:
+            logger.error('Error revoking admit_card tokens: %s', e)
+            return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error revoking admit_card tokens: {str(e)}"}))
+
     async def delete_admit_card(self, admit_card_id: int) -> ServiceResult:
         """
         Delete admit_card.
@@ -117,7 +148,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).delete(AdmitCardModel, admit_card_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error deleting admit_card: {str(e)}')
+            logger.error('Error deleting admit_card: %s', e)
             return ServiceResult(AppException.RequestDeleteItem( {"ERROR": f"Error deleting admit_card: {str(e)}"}))
 
     async def get_profile_admit_cards(self, profile_id: int) -> ServiceResult:
@@ -128,7 +159,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get_all(AdmitCardModel, filters=[AdmitCardModel.profile_id == profile_id])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_cards: {str(e)}')
+            logger.error('Error retrieving admit_cards: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_cards: {str(e)}"}))
 
     async def get_championship_admit_cards(self, championship_id: int) -> ServiceResult:
@@ -139,7 +170,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get_all(AdmitCardModel, filters=[AdmitCardModel.championship_id == championship_id])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_cards: {str(e)}')
+            logger.error('Error retrieving admit_cards: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_cards: {str(e)}"}))
 
     async def get_examination_admit_cards(self, examination_id: int) -> ServiceResult:
@@ -150,7 +181,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get_all(AdmitCardModel, filters=[AdmitCardModel.examination_ids.contains([examination_id])])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_cards: {str(e)}')
+            logger.error('Error retrieving admit_cards: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_cards: {str(e)}"}))
 
     async def get_profile_championship_admit_cards(self, profile_id: int, championship_id: int) -> ServiceResult:
@@ -161,7 +192,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get_all(AdmitCardModel, filters=[AdmitCardModel.profile_id == profile_id, AdmitCardModel.championship_id == championship_id])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_cards: {str(e)}')
+            logger.error('Error retrieving admit_cards: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_cards: {str(e)}"}))
     
     async def get_profile_examination_admit_cards(self, profile_id: int, examination_id: int) -> ServiceResult:
@@ -172,7 +203,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get_all(AdmitCardModel, filters=[AdmitCardModel.profile_id == profile_id, AdmitCardModel.examination_ids.contains([examination_id])])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_cards: {str(e)}')
+            logger.error('Error retrieving admit_cards: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_cards: {str(e)}"}))
 
     async def get_championship_examination_admit_cards(self, championship_id: int, examination_id: int) -> ServiceResult:
@@ -183,7 +214,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get_all(AdmitCardModel, filters=[AdmitCardModel.championship_id == championship_id, AdmitCardModel.examination_ids.contains([examination_id])])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_cards: {str(e)}')
+            logger.error('Error retrieving admit_cards: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_cards: {str(e)}"}))
 
     async def get_profile_championship_examination_admit_cards(self, profile_id: int, championship_id: int, examination_id: int) -> ServiceResult:
@@ -194,7 +225,7 @@ class AdmitCardService(AppService):
             result = await AdmitCardCRUD(self.db).get_all(AdmitCardModel, filters=[AdmitCardModel.profile_id == profile_id, AdmitCardModel.championship_id == championship_id, AdmitCardModel.examination_ids.contains([examination_id])])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving admit_cards: {str(e)}')
+            logger.error('Error retrieving admit_cards: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving admit_cards: {str(e)}"}))
 
 class AdmitCardCRUD(AppCRUD):
@@ -204,12 +235,12 @@ class AdmitCardCRUD(AppCRUD):
         Retrieve all items.
         """
         try:
-            query = self.db.query(model)
+            query = select(model)
             if filters:
                 query = query.filter(*filters)
-            return query.order_by(asc(model.id)).offset(skip).limit(limit).all()
+            return (await self.db.scalars(query.order_by(asc(model.id)).offset(skip).limit(limit))).all()
         except Exception as e:
-            logger.error(f'Error retrieving items: {str(e)}')
+            logger.error('Error retrieving items: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving items: {str(e)}"})
 
     async def create(self, profile_id: int, championship_id: int, examination_ids: List[int], item: dict) -> ServiceResult:
@@ -219,22 +250,30 @@ class AdmitCardCRUD(AppCRUD):
         try:
             item = AdmitCardModel(**item, profile_id=profile_id, championship_id=championship_id, examination_ids=examination_ids)
             self.db.add(item)
-            self.db.commit()
-            self.db.refresh(item)
+            await self.db.commit()
+            await self.db.refresh(item)
+            await self._forget_unknown(item.id)
             return item
         except Exception as e:
-            logger.error(f'Error creating item: {str(e)}')
+            logger.error('Error creating item: %s', e)
             return AppException.RequestCreateItem( {"ERROR": f"Error creating item: {str(e)}"})
 
+    async def _forget_unknown(self, item_id: int) -> None:
+        # the id may have been probed before it existed, it must log in right away
+        try:
+            await LoginThrottle(self.db, AsyncRedis().client).forget_unknown(item_id)
+        except Exception as e:
+            logger.error('Error clearing unknown admit_card %s: %s', item_id, e)
+
     async def get(self, model, item_id: int) -> ServiceResult:
         """
         Retrieve item by id.
         """
         try:
-            item = self.db.query(model).filter(model.id == item_id).first()
+            item = await self.db.scalar(select(model).filter(model.id == item_id))
             return item
         except Exception as e:
-            logger.error(f'Error retrieving item: {str(e)}')
+            logger.error('Error retrieving item: %s', e)
             return ServiceResult(AppException.RequestAuthenticateItem( {"ERROR": "Invalid password"}))
 
     async def update(self, model, item_id: int, item: dict, championship_id: int, examination_ids: List[int]) -> ServiceResult:
@@ -242,27 +281,41 @@ class AdmitCardCRUD(AppCRUD):
         Update item by id.
         """
         try:
-            record = self.db.query(model).filter(model.id == item_id).first()
+            record = await self.db.scalar(select(model).filter(model.id == item_id))
+            exams_changed = set(record.examination_ids or []) != set(examination_ids or [])
             record.order_id = item.order_id
             record.championship_id = championship_id
             record.examination_ids = examination_ids
-            self.db.commit()
-            self.db.refresh(record)
+            await self.db.commit()
+            await self.db.refresh(record)
+            await invalidate(('admit_cards', item_id))
+            if exams_changed:
+                # tokens carry the examination ids, a candidate logs in again to get the new ones
+                await AdmitCardToken(self.db, AsyncRedis().client).revoke(item_id)
             return record
         except Exception as e:
-            logger.error(f'Error updating item: {str(e)}')
+            logger.error('Error updating item: %s', e)
             return AppException.RequestUpdateItem( {"ERROR": f"Error updating item: {str(e)}"})
 
+    async def update_password_hash(self, model, item_id: int, password_hash: str) -> None:
+        """
+        Replace the password hash of an item.
+        """
+        await self.db.execute(update(model).where(model.id == item_id).values(password_hash=password_hash))
+        await self.db.commit()
+
     async def delete(self, model, item_id: int) -> ServiceResult:
         """
         Delete item by id.
         """
         try:
-            item = self.db.query(model).filter(model.id == item_id).first()
-            self.db.delete(item)
-            self.db.commit()
+            item = await self.db.scalar(select(model).filter(model.id == item_id))
+            await self.db.delete(item)
+            await self.db.commit()
+            await invalidate(('admit_cards', item_id))
+            await AdmitCardToken(self.db, AsyncRedis().client).revoke(item_id)
             return item
         except Exception as e:
-            logger.error(f'Error deleting item: {str(e)}')
+            logger.error('Error deleting item: %s', e)
             return AppException.RequestDeleteItem( {"ERROR": f"Error deleting item: {str(e)}"})
     
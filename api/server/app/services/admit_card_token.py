@@ -0,0 +1,104 @@
+from app.services.main import AppCRUD
+
+from app.models.admit_card import AdmitCard as AdmitCardModel
+from app.db.local_cache import get_local_cache
+from app.db.single_flight import fetch_json_once
+from app.db import cache_keys, invalidation
+from app.utils.jwt import create_jwt_token, decode_jwt_token
+from app.utils import serializer
+
+from sqlalchemy import select
+from typing import List, Optional
+
+import os
+
+
+# Every worker drops its copy of a token version published here.
+REVOKE_CHANNEL = 'auth:revoke'
+
+# admit card id -> token version, as checked on every authenticated request. The TTL bounds how long
+# a revocation whose message this worker missed goes unnoticed, the cache is also dropped on resubscribe.
+_versions = get_local_cache('token_versions', maxsize=int(os.getenv("TOKEN_VERSION_CACHE_MAXSIZE", 10000)),
+                            ttl=float(os.getenv("TOKEN_VERSION_CACHE_TTL", 5)))
+
+
+def _claims(payload: dict) -> Optional[dict]:
+    if 'sub' in payload:
+        return payload
+    # tokens issued before the slim format carry the whole admit card row, accept them until they expire
+    if 'id' not in payload:
+        return None
+    return {'sub': str(payload['id']), 'exams': payload.get('examination_ids') or [], 'ver': 0, 'exp': payload.get('exp')}
+
+
+class AdmitCardToken(AppCRUD):
+    """
+    Slim admit card tokens: the subject, its examination ids and a token version.
+
+    Bumping the version of an admit card revokes every token issued to it, the rest of the
+    admit card is looked up in the cache when an endpoint needs it.
+    """
+
+    async def issue(self, admit_card_id: int, examination_ids: Optional[List[int]]) -> str:
+        """
+        Token of an admit card, valid until its version is bumped or it expires.
+        """
+        version = await self.version(admit_card_id)
+        return create_jwt_token({'sub': str(admit_card_id), 'exams': examination_ids or [], 'ver': version})
+
+    async def verify(self, token: str) -> Optional[dict]:
+        """
+        Claims of a valid, unrevoked token, None otherwise.
+        """
+        payload = decode_jwt_token(token)
+        claims = _claims(payload) if payload else None
+        if claims is None or claims['ver'] != await self.version(int(claims['sub'])):
+            return None
+        return claims
+
+    async def version(self, admit_card_id: int) -> int:
+        version = _versions.get(admit_card_id)
+        if version is None:
+            version = int(await self.cache.get(cache_keys.token_version(admit_card_id)) or 0)
+            _versions.set(admit_card_id, version)
+        return version
+
+    async def revoke(self, admit_card_id: int) -> int:
+        """
+        Revoke every token issued to an admit card on all workers, returns the new version.
+        """
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.incr(cache_keys.token_version(admit_card_id))
+            pipe.publish(REVOKE_CHANNEL, serializer.dumps(admit_card_id))
+            version, _ = await pipe.execute()
+        _versions.delete(admit_card_id)
+        return version
+
+    async def admit_card(self, admit_card_id: int) -> Optional[dict]:
+        """
+        The admit card row without its password hash, from the cache.
+        """
+        local_admit_cards = get_local_cache('admit_cards')
+        admit_card = local_admit_cards.get(admit_card_id)
+        if admit_card is not None:
+            return admit_card
+
+        async def fetch(db):
+            record = await db.scalar(select(AdmitCardModel).filter(AdmitCardModel.id == admit_card_id))
+            if record is None:
+                return None
+            admit_card = record.as_dict()
+            admit_card.pop('password_hash', None)
+            return admit_card
+
+        admit_card = await fetch_json_once(self.cache, cache_keys.admit_card(admit_card_id), cache_keys.TTL['admit_cards'], fetch)
+        if admit_card is not None:
+            local_admit_cards.set(admit_card_id, admit_card)
+        return admit_card
+
+
+async def _on_revoke(admit_card_id: int) -> None:
+    _versions.delete(admit_card_id)
+
+
+invalidation.add_handler(REVOKE_CHANNEL, _on_revoke)
@@ -6,7 +6,7 @@ from app.utils.service_request import ServiceResult
 from app.models.answer import Answer as AnswerModel
 from app.schemas.answer import Answer as AnswerSchema
 
-from sqlalchemy import asc, desc, and_
+from sqlalchemy import asc, desc, and_, select
 from typing import List, Any , Optional, Union
 
 import logging
@@ -25,7 +25,7 @@ class AnswerService(AppService):
             result = await AnswerCRUD(self.db).get_all(AnswerModel, skip=skip, limit=limit)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving answers: {str(e)}')
+            logger.error('Error retrieving answers: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving answers: {str(e)}"}))
 
     async def create_answer(self, question_id: int, answer: AnswerSchema) -> ServiceResult:
@@ -36,7 +36,7 @@ class AnswerService(AppService):
             result = await AnswerCRUD(self.db).create(AnswerModel,question_id, answer)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error creating answer: {str(e)}')
+            logger.error('Error creating answer: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating answer: {str(e)}"}))
 
     async def get_answer(self, answer_id: int) -> ServiceResult:
@@ -47,7 +47,7 @@ class AnswerService(AppService):
             result = await AnswerCRUD(self.db).get(AnswerModel, answer_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving answer: {str(e)}')
+            logger.error('Error retrieving answer: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving answer: {str(e)}"}))
 
     async def update_answer(self, answer_id: int, answer: AnswerSchema) -> ServiceResult:
@@ -58,7 +58,7 @@ class AnswerService(AppService):
             result = await AnswerCRUD(self.db).update(AnswerModel, answer_id, answer)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error updating answer: {str(e)}')
+            logger.error('Error updating answer: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating answer: {str(e)}"}))
 
     async def delete_answer(self, answer_id: int) -> ServiceResult:
@@ -69,7 +69,7 @@ class AnswerService(AppService):
             result = await AnswerCRUD(self.db).delete(AnswerModel, answer_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error deleting answer: {str(e)}')
+            logger.error('Error deleting answer: %s', e)
             return ServiceResult(AppException.RequestDeleteItem( {"ERROR": f"Error deleting answer: {str(e)}"}))
 
     async  def get_answers_by_question_id(self, question_id: int) -> ServiceResult:
@@ -80,7 +80,7 @@ class AnswerService(AppService):
             result = await AnswerCRUD(self.db).get_all(AnswerModel, filters=[AnswerModel.question_id == question_id])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving answers: {str(e)}')
+            logger.error('Error retrieving answers: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving answers: {str(e)}"}))
 
     async def get_question_answers(self, question_id: int) -> ServiceResult:
@@ -91,7 +91,7 @@ class AnswerService(AppService):
             result = await AnswerCRUD(self.db).get_all(AnswerModel, filters=[AnswerModel.question_id == question_id])
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving answers: {str(e)}')
+            logger.error('Error retrieving answers: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving answers: {str(e)}"}))
 
 class AnswerCRUD(AppCRUD):
@@ -101,12 +101,12 @@ class AnswerCRUD(AppCRUD):
         Retrieve all answers.
         """
         try:
-            query = self.db.query(model)
+            query = select(model)
             if filters:
                 query = query.filter(*filters)
-            return query.order_by(asc(model.id)).offset(skip).limit(limit).all()
+            return (await self.db.scalars(query.order_by(asc(model.id)).offset(skip).limit(limit))).all()
         except Exception as e:
-            logger.error(f'Error retrieving answers: {str(e)}')
+            logger.error('Error retrieving answers: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving answers: {str(e)}"}))
 
     async def create(self, model, question_id: int, answer) -> AnswerModel:
@@ -115,14 +115,14 @@ class AnswerCRUD(AppCRUD):
         """
 
         try:
-            answer = model(**answer.dict(), question_id=question_id)
+            answer = model(**answer.model_dump(), question_id=question_id)
             self.db.add(answer)
-            self.db.commit()
-            self.db.refresh(answer)
+            await self.db.commit()
+            await self.db.refresh(answer)
             return answer
 
         except Exception as e:
-            logger.error(f'Error creating answer: {str(e)}')
+            logger.error('Error creating answer: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating answer: {str(e)}"}))
 
     async def get(self, model, answer_id: int) -> AnswerModel:
@@ -130,9 +130,9 @@ class AnswerCRUD(AppCRUD):
         Retrieve answer.
         """
         try:
-            return self.db.query(model).filter(model.id == answer_id).first()
+            return await self.db.scalar(select(model).filter(model.id == answer_id))
         except Exception as e:
-            logger.error(f'Error retrieving answer: {str(e)}')
+            logger.error('Error retrieving answer: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving answer: {str(e)}"}))
 
     async def update(self, model, id: int, schema) -> AnswerModel:
@@ -141,20 +141,20 @@ class AnswerCRUD(AppCRUD):
         """
         try:
             # Get the existing record
-            record = self.db.query(model).filter(model.id == id).first()
+            record = await self.db.scalar(select(model).filter(model.id == id))
             if not record:
                 raise ValueError("Record not found")
 
             # Update the record with the new values
-            for field, value in schema.dict().items():
+            for field, value in schema.model_dump().items():
                 if hasattr(record, field):
                     setattr(record, field, value)
 
-            self.db.commit()
-            self.db.refresh(record)
+            await self.db.commit()
+            await self.db.refresh(record)
             return record
         except Exception as e:
-            logger.error(f'Error updating answer: {str(e)}')
+            logger.error('Error updating answer: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating answer: {str(e)}"}))
 
     async def delete(self, model, answer_id: int) -> AnswerModel:
@@ -162,14 +162,14 @@ class AnswerCRUD(AppCRUD):
         Delete answer.
         """
         try:
-            answer = self.db.query(model).filter(model.id == answer_id).first()
+            answer = await self.db.scalar(select(model).filter(model.id == answer_id))
             if not answer:
                 raise ValueError(f'Answer not found for id: {answer_id}')
 
-            self.db.delete(answer)
-            self.db.commit()
+            await self.db.delete(answer)
+            await self.db.commit()
             return answer
 
         except Exception as e:
-            logger.error(f'Error deleting answer: {str(e)}')
+            logger.error('Error deleting answer: %s', e)
             return ServiceResult(AppException.RequestDeleteItem( {"ERROR": f"Error deleting answer: {str(e)}"}))
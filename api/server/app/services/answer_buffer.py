@@ -0,0 +1,220 @@
+from app.utils.app_exceptions import AppException
+from app.services.main import AppCRUD
+from app.services.ques_attempt import QuestionAttemptCRUD
+
+from app.models.question_attempt import QuestionAttempt as QuestionAttemptModel
+from app.db.session import AsyncSessionDB
+from app.db.redis import AsyncRedis
+from app.db import cache_keys
+
+from sqlalchemy.exc import DataError, IntegrityError
+from typing import Dict, List
+
+import asyncio
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+# Each admit card has a hash of pending answers, question_id -> answer, not yet written to
+# Postgres, and a lock held by whoever flushes it so two flushes never race each other in
+# Postgres. A set tracks the admit cards that have pending answers.
+
+# Drop the flushed fields whose value did not change meanwhile, keep the admit card marked
+# dirty while anything is left and release the flush lock.
+# KEYS: pending hash, dirty set, lock   ARGV: admit_card_id, lock token, field, value, ...
+RELEASE_SCRIPT = """
+for i = 3, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+if redis.call('HLEN', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[1])
+else
+    redis.call('SADD', KEYS[2], ARGV[1])
+end
+if redis.call('GET', KEYS[3]) == ARGV[2] then
+    redis.call('DEL', KEYS[3])
+end
+return 1
+"""
+
+
+def enabled() -> bool:
+    """
+    Write-behind is opt-in with ANSWER_WRITE_BEHIND=true and needs Redis running with AOF.
+    """
+    return os.environ.get('ANSWER_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+
+
+class AnswerBuffer(AppCRUD):
+    """
+    Buffers answers in Redis and drains them to sa_questionattempt in batched upserts.
+    """
+
+    lock_ttl_ms = int(os.environ.get('ANSWER_FLUSH_LOCK_TTL_MS', 30000))
+
+    async def put(self, admit_card_id: int, answers: Dict[int, str]) -> None:
+        """
+        Buffer answers of an admit card.
+        """
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hset(cache_keys.answers_pending(admit_card_id), mapping=answers)
+            pipe.sadd(cache_keys.ANSWERS_DIRTY, admit_card_id)
+            await pipe.execute()
+
+    async def get(self, admit_card_id: int) -> Dict[int, str]:
+        """
+        Buffered answers of an admit card keyed by question id.
+        """
+        pending = await self.cache.hgetall(cache_keys.answers_pending(admit_card_id))
+        return {int(question_id): answer for question_id, answer in pending.items()}
+
+    async def flush(self, admit_card_id: int, timeout: float = 10) -> None:
+        """
+        Write every buffered answer of an admit card to Postgres, waiting for a running flush if needed.
+        """
+        token = uuid.uuid4().hex
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not await self.cache.set(cache_keys.answers_lock(admit_card_id), token, nx=True, px=self.lock_ttl_ms):
+            if asyncio.get_running_loop().time() > deadline:
+                raise AppException.RequestUpdateItem({"ERROR": "Timed out waiting for buffered answers to be saved"})
+            await asyncio.sleep(0.05)
+        await self._flush({admit_card_id: token})
+
+    async def flush_dirty(self, batch_size: int = 500) -> int:
+        """
+        Flush up to batch_size dirty admit cards in one upsert, returns how many were flushed.
+        """
+        # the admit cards stay in the dirty set until RELEASE_SCRIPT drops them after the upsert,
+        # so a flush that fails or a worker killed midway leaves them to the next round
+        admit_card_ids = await self.cache.srandmember(cache_keys.ANSWERS_DIRTY, batch_size)
+        if not admit_card_ids:
+            return 0
+
+        token = uuid.uuid4().hex
+        async with self.cache.pipeline(transaction=False) as pipe:
+            for admit_card_id in admit_card_ids:
+                pipe.set(cache_keys.answers_lock(admit_card_id), token, nx=True, px=self.lock_ttl_ms)
+            acquired = await pipe.execute()
+
+        # the others are being flushed by someone else, who releases them
+        tokens = {int(admit_card_id): token for admit_card_id, ok in zip(admit_card_ids, acquired) if ok}
+        await self._flush(tokens)
+        return len(tokens)
+
+    async def _flush(self, tokens: Dict[int, str]) -> None:
+        """
+        Upsert the pending answers of admit cards whose flush lock is held with the given tokens.
+        """
+        if not tokens:
+            return
+
+        async with self.cache.pipeline(transaction=False) as pipe:
+            for admit_card_id in tokens:
+                pipe.hgetall(cache_keys.answers_pending(admit_card_id))
+            snapshots = dict(zip(tokens, await pipe.execute()))
+
+        rows = [
+            {'admit_card_id': admit_card_id, 'question_id': int(question_id), 'answer': answer}
+            for admit_card_id, pending in snapshots.items()
+            for question_id, answer in pending.items()
+        ]
+        # fields to drop from the buffer per admit card, what is left is handed back
+        released = {admit_card_id: {} for admit_card_id in snapshots}
+        try:
+            try:
+                if rows:
+                    await QuestionAttemptCRUD(self.db).upsert_many(QuestionAttemptModel, rows)
+                released = snapshots
+            except AppException.RequestUpdateItem as e:
+                # one bad row fails the whole statement, write each admit card on its own so the
+                # others get through
+                if not _bad_row(e):
+                    raise
+                for admit_card_id, pending in snapshots.items():
+                    await self._flush_one(admit_card_id, pending, released[admit_card_id])
+        finally:
+            release = self.cache.register_script(RELEASE_SCRIPT)
+            async with self.cache.pipeline(transaction=False) as pipe:
+                for admit_card_id, pending in released.items():
+                    args = [admit_card_id, tokens[admit_card_id]]
+                    for question_id, answer in pending.items():
+                        args.extend((question_id, answer))
+                    await release(keys=[cache_keys.answers_pending(admit_card_id), cache_keys.ANSWERS_DIRTY, cache_keys.answers_lock(admit_card_id)],
+                                  args=args, client=pipe)
+                await pipe.execute()
+
+    async def _flush_one(self, admit_card_id: int, pending: Dict[str, str], released: Dict[str, str]) -> None:
+        """
+        Upsert the pending answers of one admit card, row by row when one of them is rejected.
+        Rejected rows are logged and dropped, released collects the fields done with.
+        """
+        crud = QuestionAttemptCRUD(self.db)
+        try:
+            await crud.upsert_many(QuestionAttemptModel, [{'admit_card_id': admit_card_id, 'question_id': int(question_id), 'answer': answer}
+                                                          for question_id, answer in pending.items()])
+            released.update(pending)
+            return
+        except AppException.RequestUpdateItem as e:
+            # Postgres being unreachable is no reason to drop anything, the caller hands the rest back
+            if not _bad_row(e):
+                raise
+
+        for question_id, answer in pending.items():
+            try:
+                await crud.upsert_many(QuestionAttemptModel, [{'admit_card_id': admit_card_id, 'question_id': int(question_id), 'answer': answer}])
+            except AppException.RequestUpdateItem as e:
+                if not _bad_row(e):
+                    raise
+                # e.g. the question was deleted after it was answered, retrying would block the admit card for good
+                logger.error('Dropping buffered answer %r of admit card %s to question %s: %s',
+                             answer, admit_card_id, question_id, e.__context__)
+            released[question_id] = answer
+
+
+def _bad_row(e: AppException.RequestUpdateItem) -> bool:
+    # upsert_many wraps the database error, a rejected row rather than a failing database
+    return isinstance(e.__context__, (IntegrityError, DataError))
+
+
+async def _drain(batch_size: int) -> int:
+    db = AsyncSessionDB().get_session()
+    try:
+        return await AnswerBuffer(db, AsyncRedis().client).flush_dirty(batch_size)
+    finally:
+        await db.close()
+
+
+async def run_flusher() -> None:
+    """
+    Background task draining the buffer every ANSWER_FLUSH_INTERVAL seconds.
+    """
+    interval = float(os.environ.get('ANSWER_FLUSH_INTERVAL', 1))
+    batch_size = int(os.environ.get('ANSWER_FLUSH_BATCH', 500))
+    while True:
+        try:
+            # keep going while full batches come back, sleep once the buffer is drained
+            while await _drain(batch_size) >= batch_size:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error('Error flushing buffered answers: %s', e)
+        await asyncio.sleep(interval)
+
+
+async def drain_all() -> None:
+    """
+    Flush everything still buffered, used on shutdown.
+    """
+    batch_size = int(os.environ.get('ANSWER_FLUSH_BATCH', 500))
+    deadline = asyncio.get_running_loop().time() + float(os.environ.get('ANSWER_DRAIN_TIMEOUT', 20))
+    try:
+        while await _drain(batch_size) and asyncio.get_running_loop().time() < deadline:
+            pass
+    except Exception as e:
+        logger.error('Error flushing buffered answers on shutdown: %s', e)
@@ -0,0 +1,84 @@
+from app.services.main import AppCRUD
+from app.services.ques_attempt import QuestionAttemptCRUD
+from app.services import answer_buffer
+from app.services.answer_buffer import AnswerBuffer
+
+from app.models.question_attempt import QuestionAttempt as QuestionAttemptModel
+from app.db import cache_keys
+from app.db.invalidation import examination_version
+
+from typing import Dict, List
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Field of the sheet hash set once it holds every answer of the candidate, without it the
+# hash may only hold the answers written since it expired.
+LOADED = 'loaded'
+
+
+class AnswerSheet(AppCRUD):
+    """
+    Answers of a candidate in an examination, kept in a Redis hash question_id -> answer.
+
+    Every answer write is recorded in the sheet, a sheet that expired is rebuilt from
+    Postgres on the next read, so candidate reads never query sa_questionattempt.
+    """
+
+    async def get(self, examination_id: int, admit_card_id: int, question_ids: List[int]) -> Dict[int, str]:
+        """
+        Answers of an admit card keyed by question id, question_ids are the questions of the examination.
+        """
+        sheet = await self.cache.hgetall(await self._key(examination_id, admit_card_id))
+        if LOADED not in sheet:
+            sheet = await self._load(examination_id, admit_card_id, question_ids)
+        return {int(question_id): answer for question_id, answer in sheet.items() if question_id != LOADED}
+
+    async def record(self, examination_id: int, admit_card_id: int, answers: Dict[int, str]) -> None:
+        """
+        Record answers written to Postgres or to the answer buffer, and bump the answer sheet version.
+
+        The answers are already stored when this runs, so a failure does not fail the write: the
+        sheet is dropped instead and rebuilt from Postgres and the buffer on the next read.
+        """
+        try:
+            key = await self._key(examination_id, admit_card_id)
+            async with self.cache.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=answers)
+                pipe.expire(key, cache_keys.TTL['answer_sheets'])
+                pipe.set(cache_keys.answer_sheet_version(admit_card_id), time.time_ns(), ex=cache_keys.TTL['exam_attempts'])
+                await pipe.execute()
+        except Exception as e:
+            logger.error('Error recording answers of admit card %s in examination %s: %s', admit_card_id, examination_id, e)
+            try:
+                # the version goes too, so no ETag matches the answers served before this write
+                await self.cache.delete(await self._key(examination_id, admit_card_id), cache_keys.answer_sheet_version(admit_card_id))
+            except Exception as e:
+                logger.error('Error dropping answer sheet of admit card %s in examination %s: %s', admit_card_id, examination_id, e)
+
+    async def _key(self, examination_id: int, admit_card_id: int) -> str:
+        return cache_keys.answer_sheet(examination_id, await examination_version(self.cache, examination_id), admit_card_id)
+
+    async def _load(self, examination_id: int, admit_card_id: int, question_ids: List[int]) -> Dict[str, str]:
+        attempts = await QuestionAttemptCRUD(self.db).get_all(
+            limit=len(question_ids),
+            filters=[QuestionAttemptModel.admit_card_id == admit_card_id,
+                     QuestionAttemptModel.question_id.in_(question_ids)]
+        )
+        answers = {attempt.question_id: attempt.answer for attempt in attempts if attempt.answer is not None}
+        if answer_buffer.enabled():
+            # an answer still waiting in the buffer is newer than the one in Postgres
+            answers.update(await AnswerBuffer(self.db, self.cache).get(admit_card_id))
+
+        # a write recorded while we were reading is newer, HSETNX leaves it in place
+        key = await self._key(examination_id, admit_card_id)
+        async with self.cache.pipeline(transaction=True) as pipe:
+            for question_id, answer in answers.items():
+                pipe.hsetnx(key, question_id, answer)
+            pipe.hset(key, LOADED, 1)
+            pipe.expire(key, cache_keys.TTL['answer_sheets'])
+            pipe.hgetall(key)
+            return (await pipe.execute())[-1]
@@ -5,8 +5,12 @@ from app.utils.service_request import ServiceResult
 
 from app.models.championship import Championship as ChampionshipModel
 from app.schemas.championship import Championship as ChampionshipSchema
+from app.db.local_cache import get_local_cache
+from app.db.invalidation import invalidate
+from app.db import cache_keys
+from app.db.single_flight import fetch_json_once
 
-from sqlalchemy import asc, desc, and_
+from sqlalchemy import asc, desc, and_, select
 from typing import List, Any , Optional, Union
 
 import logging
@@ -23,12 +27,28 @@ class ChampionshipService(AppService):
         Retrieve championships.
         """
         try:
-            result = await ChampionshipCRUD(self.db).get_all(ChampionshipModel, skip=skip, limit=limit)
-            return ServiceResult(result)
+            championships = await self._get_cached_or_fetched_championships()
+            return ServiceResult(championships[skip:skip + limit])
         except Exception as e:
-            logger.error(f'Error retrieving championships: {str(e)}')
+            logger.error('Error retrieving championships: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving championships: {str(e)}"}))
 
+    async def _get_cached_or_fetched_championships(self):
+        # every active championship is cached as one listing, pages are sliced from it
+        local_championships = get_local_cache('championships')
+        championships = local_championships.get(None)
+        if championships is not None:
+            return championships
+
+        async def fetch(db):
+            championships = await ChampionshipCRUD(db).get_all(ChampionshipModel, skip=0, limit=None)
+            return [championship.as_dict() for championship in championships]
+
+        championships = await fetch_json_once(self.cache, cache_keys.championships(),
+                                              cache_keys.TTL['championships'], fetch)
+        local_championships.set(None, championships)
+        return championships
+
     async def create_championship(self,  championship: ChampionshipSchema) -> ServiceResult:
         """
         Create new championship.
@@ -37,7 +57,7 @@ class ChampionshipService(AppService):
             result = await ChampionshipCRUD(self.db).create(ChampionshipModel, championship)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error creating championship: {str(e)}')
+            logger.error('Error creating championship: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating championship: {str(e)}"}))
 
     async def get_championship(self, championship_id: int) -> ServiceResult:
@@ -48,7 +68,7 @@ class ChampionshipService(AppService):
             result = await ChampionshipCRUD(self.db).get(ChampionshipModel, championship_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving championship: {str(e)}')
+            logger.error('Error retrieving championship: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving championship: {str(e)}"}))
 
     async def update_championship(self, championship_id: int, championship: ChampionshipSchema) -> ServiceResult:
@@ -59,7 +79,7 @@ class ChampionshipService(AppService):
             result = await ChampionshipCRUD(self.db).update(ChampionshipModel, championship_id, championship)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error updating championship: {str(e)}')
+            logger.error('Error updating championship: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating championship: {str(e)}"}))
     
     async def delete_championship(self, championship_id: int) -> ServiceResult:
@@ -70,7 +90,7 @@ class ChampionshipService(AppService):
             result = await ChampionshipCRUD(self.db).delete(ChampionshipModel, championship_id)
             return ServiceResult(True)
         except Exception as e:
-            logger.error(f'Error deleting championship: {str(e)}')
+            logger.error('Error deleting championship: %s', e)
             return ServiceResult(False)
 
 class ChampionshipCRUD(AppCRUD):
@@ -81,7 +101,7 @@ class ChampionshipCRUD(AppCRUD):
         """
         try:
             # Get all records
-            result =  self.db.query(model).filter(model.active == True).offset(skip).limit(limit).all()
+            result =  (await self.db.scalars(select(model).filter(model.active == True).offset(skip).limit(limit))).all()
             return result
         except Exception as e:
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving championships: {str(e)}"})
@@ -91,10 +111,11 @@ class ChampionshipCRUD(AppCRUD):
         Create new record.
         """
         try:
-            result = model(**schema.dict())
+            result = model(**schema.model_dump())
             self.db.add(result)
-            self.db.commit()
-            self.db.refresh(result)
+            await self.db.commit()
+            await self.db.refresh(result)
+            await invalidate(('championships', None))
             return result
         except Exception as e:
             return AppException.RequestCreateItem( {"ERROR": f"Error creating championship: {str(e)}"})
@@ -104,7 +125,7 @@ class ChampionshipCRUD(AppCRUD):
         Retrieve record by id.
         """
         try:
-            result = self.db.query(model).filter(model.id == id).first()
+            result = await self.db.scalar(select(model).filter(model.id == id))
             return result
         except Exception as e:
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving championship: {str(e)}"})
@@ -115,17 +136,18 @@ class ChampionshipCRUD(AppCRUD):
         """
         try:
             # Get the existing record
-            record = self.db.query(model).filter(model.id == id).first()
+            record = await self.db.scalar(select(model).filter(model.id == id))
             if not record:
                 raise ValueError("Record not found")
 
             # Update the record with the new values
-            for field, value in schema.dict().items():
+            for field, value in schema.model_dump().items():
                 if hasattr(record, field):
                     setattr(record, field, value)
 
-            self.db.commit()
-            self.db.refresh(record)
+            await self.db.commit()
+            await self.db.refresh(record)
+            await invalidate(('championships', None))
             return record
         except Exception as e:
             return AppException.RequestUpdateItem( {"ERROR": f"Error updating championship: {str(e)}"})
@@ -135,11 +157,12 @@ class ChampionshipCRUD(AppCRUD):
         Delete record by id.
         """
         try:
-            record = self.db.query(model).filter(model.id == id).first()
+            record = await self.db.scalar(select(model).filter(model.id == id))
             if not record:
                 raise ValueError("Record not found")
-            self.db.delete(record)
-            self.db.commit()
+            await self.db.delete(record)
+            await self.db.commit()
+            await invalidate(('championships', None))
             return record
         except Exception as e:
             return AppException.RequestUpdateItem( {"ERROR": f"Error deleting championship: {str(e)}"})
\ No newline at end of file
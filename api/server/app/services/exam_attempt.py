@@ -4,22 +4,48 @@ from app.services.main import AppService, AppCRUD
 from app.utils.service_request import ServiceResult
 
 from app.models.exam_attempt import ExamAttempt
-
-from sqlalchemy import asc, desc, and_
+from app.models.admit_card import AdmitCard as AdmitCardModel
+from app.services import answer_buffer
+from app.services.answer_buffer import AnswerBuffer
+from app.db import cache_keys
+from app.db.invalidation import examination_version
+from app.utils import serializer
+
+from sqlalchemy import asc, desc, and_, select, false, func, literal
 from sqlalchemy.dialects.postgresql import insert
 from typing import List, Any , Optional, Union
 
 import logging
 import datetime
-import json
 
 logger = logging.getLogger(__name__)
 
 class ExamAttemptCRUD(AppCRUD):
 
+    async def _key(self, examination_id: int, admit_card_id: int) -> str:
+        return cache_keys.exam_attempt(examination_id, await examination_version(self.cache, examination_id), admit_card_id)
+
     async def get(self, examination_id:int , admit_card_id:int, model = ExamAttempt):
-        return self.db.query(model).filter(and_(model.admit_card_id==admit_card_id, model.examination_id == examination_id)).first()
+        return await self.db.scalar(select(model).filter(and_(model.admit_card_id==admit_card_id, model.examination_id == examination_id)))
+
+
+    async def get_cached(self, examination_id:int , admit_card_id:int, model = ExamAttempt):
+        """
+        Get the examination attempt from the cache, falling back to the database without creating it
+        """
+
+        key = await self._key(examination_id, admit_card_id)
+        exam_attempt = serializer.loads(await self.cache.get(key) or '{}')
+
+        if exam_attempt:
+            return ExamAttempt(**exam_attempt)
 
+        exam_attempt = await self.get(examination_id, admit_card_id)
+
+        if exam_attempt:
+            await self.cache.set(key, serializer.dumps(exam_attempt.as_dict()), ex=cache_keys.TTL['exam_attempts'])
+
+        return exam_attempt
 
     async def get_create(self, examination_id:int , admit_card_id:int, model = ExamAttempt):
         """
@@ -28,7 +54,8 @@ class ExamAttemptCRUD(AppCRUD):
 
         #check in the cache
 
-        exam_attempt = json.loads(self.cache.hget('exam_attempts', f'{admit_card_id}-{examination_id}') or '{}')
+        key = await self._key(examination_id, admit_card_id)
+        exam_attempt = serializer.loads(await self.cache.get(key) or '{}')
 
         if exam_attempt:
             return ExamAttempt(**exam_attempt)
@@ -43,25 +70,56 @@ class ExamAttemptCRUD(AppCRUD):
                 INS_DT = datetime.datetime.now()
             )
             self.db.add(exam_attempt)
-            self.db.commit()
-            self.db.refresh(exam_attempt)
+            await self.db.commit()
+            await self.db.refresh(exam_attempt)
         
-        self.cache.hset('exam_attempts', f'{admit_card_id}-{examination_id}', json.dumps(exam_attempt.as_dict() , default= str))
+        await self.cache.set(key, serializer.dumps(exam_attempt.as_dict()), ex=cache_keys.TTL['exam_attempts'])
 
         return exam_attempt
     
+    async def cache_all(self, examination_id:int, model = ExamAttempt) -> int:
+        """
+        Create the missing attempts of every admit card registered for an examination, then cache
+        all of them, so the candidates' first gated requests at the start are cache hits.
+        Returns how many were cached.
+        """
+
+        # one statement for the whole cohort, an attempt created meanwhile by get_create is kept
+        await self.db.execute(
+            insert(model)
+            .from_select(['admit_card_id', 'examination_id', 'is_submitted', 'INS_DT'],
+                         select(AdmitCardModel.id, literal(examination_id), false(), func.now())
+                         .filter(AdmitCardModel.examination_ids.contains([examination_id])))
+            .on_conflict_do_nothing(index_elements=['admit_card_id', 'examination_id'])
+        )
+        await self.db.commit()
+
+        exam_attempts = (await self.db.scalars(select(model).filter(model.examination_id == examination_id))).all()
+        exam_version = await examination_version(self.cache, examination_id)
+        async with self.cache.pipeline(transaction=False) as pipe:
+            for exam_attempt in exam_attempts:
+                pipe.set(cache_keys.exam_attempt(examination_id, exam_version, exam_attempt.admit_card_id), serializer.dumps(exam_attempt.as_dict()),
+                         ex=cache_keys.TTL['exam_attempts'])
+            await pipe.execute()
+
+        return len(exam_attempts)
+
     async def update(self, examination_id:int , admit_card_id:int, model = ExamAttempt):
         """
         Update the ExamAttempt
         """
 
+        # buffered answers must reach Postgres before the attempt is closed
+        if answer_buffer.enabled():
+            await AnswerBuffer(self.db, self.cache).flush(admit_card_id)
+
         exam_attempt = await self.get(examination_id, admit_card_id)
         exam_attempt.is_submitted =  True
         exam_attempt.END_DT = datetime.datetime.now()
-        self.db.commit()
-        self.db.refresh(exam_attempt)
+        await self.db.commit()
+        await self.db.refresh(exam_attempt)
 
-        self.cache.hdel('exam_attempts', f'{admit_card_id}-{examination_id}')
+        await self.cache.delete(await self._key(examination_id, admit_card_id))
 
         return exam_attempt
 
@@ -0,0 +1,72 @@
+from app.utils.app_exceptions import AppException
+from app.services.main import AppCRUD
+from app.utils.service_request import ServiceResult
+
+from app.models.examination import Examination as ExaminationModel
+from app.services.examination import ExaminationCRUD
+from app.services.exam_attempt import ExamAttemptCRUD
+from app.db import cache_keys
+from app.db.invalidation import examination_version
+from app.utils import serializer
+
+from typing import Optional
+
+import os
+import time
+
+
+# Admit cards allowed in outside the exam window, e.g. for rehearsals, from a comma separated EXAM_GATE_BYPASS.
+BYPASS_ADMIT_CARDS = frozenset(int(admit_card_id) for admit_card_id in os.environ.get('EXAM_GATE_BYPASS', '').split(',')
+                               if admit_card_id.strip())
+
+
+class ExamGate(AppCRUD):
+    """
+    Decides whether a candidate may read and answer the questions of an examination.
+
+    The exam window, shared by every candidate, and the candidate's attempt are read with
+    one pipelined Redis call and checked in memory. Postgres is only queried on a miss.
+    """
+
+    async def check(self, examination_id: int, admit_card_id: int) -> Optional[ServiceResult]:
+        """
+        None when the exam is open for the admit card, otherwise a failed ServiceResult.
+        """
+        exam_version = await examination_version(self.cache, examination_id)
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.get(cache_keys.examination_window(examination_id, exam_version))
+            pipe.get(cache_keys.exam_attempt(examination_id, exam_version, admit_card_id))
+            window, exam_attempt = await pipe.execute()
+
+        if admit_card_id not in BYPASS_ADMIT_CARDS:
+            if window is None:
+                window = await self._cache_window(examination_id)
+                if window is None:
+                    return ServiceResult(AppException.RequestGetItem({'ERROR': 'Examination not found'}))
+            start, end = map(float, window.split())
+            now = time.time()
+            if now < start:
+                return ServiceResult(AppException.ExaminationNotStarted({'ERROR': 'Examination has not started yet!'}))
+            if now >= end:
+                return ServiceResult(AppException.ExaminationEnded({'ERROR': 'Examination has ended!'}))
+
+        # the first visit inside the window creates the attempt
+        if exam_attempt is None:
+            is_submitted = (await ExamAttemptCRUD(self.db, self.cache).get_create(examination_id, admit_card_id)).is_submitted
+        else:
+            is_submitted = serializer.loads(exam_attempt)['is_submitted']
+        if is_submitted:
+            return ServiceResult(AppException.ExamSubmitted({'ERROR': 'Examination has already been submitted!'}))
+        return None
+
+    async def _cache_window(self, examination_id: int) -> Optional[str]:
+        examination = await ExaminationCRUD(self.db, self.cache).get(examination_id)
+        if not isinstance(examination, ExaminationModel):
+            return None
+
+        start = examination.exam_start_dt.timestamp() if examination.exam_start_dt else float('-inf')
+        end = examination.exam_end_dt.timestamp() if examination.exam_end_dt else float('inf')
+        window = f'{start} {end}'
+        await self.cache.set(cache_keys.examination_window(examination_id, await examination_version(self.cache, examination_id)),
+                             window, ex=cache_keys.TTL['examinations'])
+        return window
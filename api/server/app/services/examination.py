@@ -6,13 +6,18 @@ from app.utils.service_request import ServiceResult
 from app.models.examination import Examination as ExaminationModel
 from app.schemas.examination import Examination as ExaminationSchema
 from app.services.exam_attempt import ExamAttemptCRUD 
+from app.db.local_cache import get_local_cache
+from app.db.invalidation import invalidate, invalidate_examination, examination_version
+from app.db import cache_keys
+from app.db.single_flight import fetch_json_once
 
-from sqlalchemy import asc, desc, and_
+from sqlalchemy import asc, desc, and_, select
 from typing import List, Any , Optional, Union
 
 import logging
 import requests
 import json
+import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +31,7 @@ class ExaminationService(AppService):
             result = await ExaminationCRUD(self.db).get_all(ExaminationModel, skip=skip, limit=limit)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving examinations: {str(e)}')
+            logger.error('Error retrieving examinations: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving examinations: {str(e)}"}))
 
     async def create_examination(self, championship_id: int, examination: ExaminationSchema) -> ServiceResult:
@@ -37,7 +42,7 @@ class ExaminationService(AppService):
             result = await ExaminationCRUD(self.db).create(ExaminationModel,championship_id, examination)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error creating examination: {str(e)}')
+            logger.error('Error creating examination: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating examination: {str(e)}"}))
 
     async def get_examination(self, examination_id: int, admit_card_id:int ) -> ServiceResult:
@@ -46,11 +51,11 @@ class ExaminationService(AppService):
         """
         try:
             examination = (await ExaminationCRUD(self.db, self.cache).get( examination_id)).as_dict()
-            exam_attempt = await ExamAttemptCRUD(self.db, self.cache).get(examination_id, admit_card_id)
+            exam_attempt = await ExamAttemptCRUD(self.db, self.cache).get_cached(examination_id, admit_card_id)
             examination['is_submitted'] = exam_attempt.is_submitted if exam_attempt else False
             return ServiceResult(examination)
         except Exception as e:
-            logger.error(f'Error retrieving examination: {str(e)}')
+            logger.error('Error retrieving examination: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving examination: {str(e)}"}))
 
     async def update_examination(self, examination_id: int, examination: ExaminationSchema) -> ServiceResult:
@@ -61,7 +66,7 @@ class ExaminationService(AppService):
             result = await ExaminationCRUD(self.db).update(ExaminationModel, examination_id, examination)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error updating examination: {str(e)}')
+            logger.error('Error updating examination: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating examination: {str(e)}"}))
 
     async def delete_examination(self, examination_id: int) -> ServiceResult:
@@ -72,7 +77,7 @@ class ExaminationService(AppService):
             result = await ExaminationCRUD(self.db).delete(ExaminationModel, examination_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error deleting examination: {str(e)}')
+            logger.error('Error deleting examination: %s', e)
             return ServiceResult(AppException.RequestDeleteItem( {"ERROR": f"Error deleting examination: {str(e)}"}))
 
     async def get_championship_examinations(self, championship_id: int,  skip: int = 0, limit: int = 100) -> ServiceResult:
@@ -80,12 +85,28 @@ class ExaminationService(AppService):
         Retrieve examinations for championship.
         """
         try:
-            result = await ExaminationCRUD(self.db).get_all(  skip, limit,filters=[ExaminationModel.championship_id == championship_id])
-            return ServiceResult(result)
+            examinations = await self._get_cached_or_fetched_championship_examinations(championship_id)
+            return ServiceResult(examinations[skip:skip + limit])
         except Exception as e:
-            logger.error(f'Error retrieving championship examinations: {str(e)}')
+            logger.error('Error retrieving championship examinations: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving championship examinations: {str(e)}"}))
 
+    async def _get_cached_or_fetched_championship_examinations(self, championship_id: int):
+        # the whole listing of the championship is cached, pages are sliced from it
+        local_examinations = get_local_cache('championship_examinations')
+        examinations = local_examinations.get(championship_id)
+        if examinations is not None:
+            return examinations
+
+        async def fetch(db):
+            examinations = await ExaminationCRUD(db).get_all(0, None, filters=[ExaminationModel.championship_id == championship_id])
+            return [examination.as_dict() for examination in examinations]
+
+        examinations = await fetch_json_once(self.cache, cache_keys.championship_examinations(championship_id),
+                                             cache_keys.TTL['championship_examinations'], fetch)
+        local_examinations.set(championship_id, examinations)
+        return examinations
+
 class ExaminationCRUD(AppCRUD):
 
     async def get_all(self,  skip: int = 0, limit: int = 100,model=ExaminationModel, filters: Optional[List[Any]] = None) -> ExaminationModel:
@@ -93,12 +114,12 @@ class ExaminationCRUD(AppCRUD):
         Retrieve all examinations.
         """
         try:
-            query = self.db.query(model)
+            query = select(model)
             if filters:
                 query = query.filter(*filters)
-            return query.order_by(asc(model.name)).offset(skip).limit(limit).all()
+            return (await self.db.scalars(query.order_by(asc(model.name)).offset(skip).limit(limit))).all()
         except Exception as e:
-            logger.error(f'Error retrieving examinations: {str(e)}')
+            logger.error('Error retrieving examinations: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving examinations: {str(e)}"})
 
     async def create(self, model, championship_id: int, examination: ExaminationSchema) -> ExaminationModel:
@@ -106,13 +127,14 @@ class ExaminationCRUD(AppCRUD):
         Create new examination.
         """
         try:
-            examination = model(**examination.dict(), championship_id=championship_id)
+            examination = model(**examination.model_dump(), championship_id=championship_id)
             self.db.add(examination)
-            self.db.commit()
-            self.db.refresh(examination)
+            await self.db.commit()
+            await self.db.refresh(examination)
+            await invalidate(('championship_examinations', championship_id))
             return examination
         except Exception as e:
-            logger.error(f'Error creating examination: {str(e)}')
+            logger.error('Error creating examination: %s', e)
             return AppException.RequestCreateItem( {"ERROR": f"Error creating examination: {str(e)}"})
 
     async def get(self,  id: int,model= ExaminationModel) -> ExaminationModel:
@@ -120,13 +142,30 @@ class ExaminationCRUD(AppCRUD):
         Retrieve examination by id.
         """
         try:
-            exam_details = json.loads(self.cache.hget('examiantions', id) or '{}')
-            if not exam_details:
-                exam_details =  self.db.query(model).filter(model.id == id).first()
-                self.cache.hset('examinations', id, json.dumps(exam_details.as_dict(), default=str))
-            return exam_details
+            # this worker keeps the column values, every caller gets its own instance
+            local_examinations = get_local_cache('examinations')
+            cached = local_examinations.get(id)
+            if cached is not None:
+                return model(**cached)
+
+            def parse_dates(exam_details):
+                for field in ('exam_start_dt', 'exam_end_dt'):
+                    if exam_details[field]:
+                        exam_details[field] = datetime.datetime.fromisoformat(exam_details[field])
+                return exam_details
+
+            async def fetch(db):
+                exam_details = await db.scalar(select(model).filter(model.id == id))
+                return exam_details.as_dict() if exam_details is not None else None
+
+            exam_details = await fetch_json_once(self.cache, cache_keys.examination(id, await examination_version(self.cache, id)),
+                                                 cache_keys.TTL['examinations'], fetch, parse_dates)
+            if exam_details is None:
+                raise ValueError("Examination not found")
+            local_examinations.set(id, exam_details)
+            return model(**exam_details)
         except Exception as e:
-            logger.error(f'Error retrieving examination: {str(e)}')
+            logger.error('Error retrieving examination: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving examination: {str(e)}"})
 
     async def update(self, model, id: int, schema) -> ExaminationModel:
@@ -135,17 +174,18 @@ class ExaminationCRUD(AppCRUD):
         """
         try:
             # Get the existing record
-            record = self.db.query(model).filter(model.id == id).first()
+            record = await self.db.scalar(select(model).filter(model.id == id))
             if not record:
                 raise ValueError("Record not found")
 
             # Update the record with the new values
-            for field, value in schema.dict().items():
+            for field, value in schema.model_dump().items():
                 if hasattr(record, field):
                     setattr(record, field, value)
 
-            self.db.commit()
-            self.db.refresh(record)
+            await self.db.commit()
+            await self.db.refresh(record)
+            await invalidate_examination(id, ('championship_examinations', record.championship_id))
             return record
         except Exception as e:
             return AppException.RequestUpdateItem( {"ERROR": f"Error updating championship: {str(e)}"})
@@ -155,12 +195,14 @@ class ExaminationCRUD(AppCRUD):
         Delete examination by id.
         """
         try:
-            record = self.db.query(model).filter(model.id == id).first()
+            record = await self.db.scalar(select(model).filter(model.id == id))
             if not record:
                 raise ValueError("Record not found")
-            self.db.delete(record)
-            self.db.commit()
+            await self.db.delete(record)
+            await self.db.commit()
+            # the bump orphans every key of the exam, attempts and answer sheets included
+            await invalidate_examination(id, ('championship_examinations', record.championship_id))
             return record
         except Exception as e:
-            logger.error(f'Error deleting examination: {str(e)}')
+            logger.error('Error deleting examination: %s', e)
             return AppException.RequestDeleteItem( {"ERROR": f"Error deleting examination: {str(e)}"})
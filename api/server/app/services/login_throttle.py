@@ -0,0 +1,129 @@
+from app.utils.app_exceptions import AppException
+from app.services.main import AppCRUD
+from app.utils.service_request import ServiceResult
+
+from app.db import cache_keys
+
+from typing import Optional
+
+import logging
+import math
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Refill every bucket up to now, then take cost tokens from each of them, or from none when one is empty.
+# A bucket with cost 0 is only checked. Returns 0 when the attempt is allowed, otherwise the milliseconds
+# until it would be.
+# KEYS: buckets   ARGV: now in ms, then capacity, refill per ms and cost of each bucket
+TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local rate = tonumber(ARGV[i * 3])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    level = math.min(capacity, level + math.max(0, now - ts) * rate)
+    if level < 1 then
+        wait = math.max(wait, math.ceil((1 - level) / rate))
+    end
+    levels[i] = level
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local rate = tonumber(ARGV[i * 3])
+    local cost = tonumber(ARGV[i * 3 + 1])
+    if cost > 0 then
+        if wait == 0 then
+            levels[i] = levels[i] - cost
+        end
+        redis.call('HSET', key, 'tokens', tostring(levels[i]), 'ts', now)
+        redis.call('PEXPIRE', key, math.ceil(capacity / rate))
+    end
+end
+return wait
+"""
+
+
+def _bucket(scope: str, burst: int, per_minute: int):
+    return (int(os.environ.get(f'LOGIN_{scope}_BURST', burst)),
+            float(os.environ.get(f'LOGIN_{scope}_PER_MINUTE', per_minute)) / 60000)
+
+
+# An admit card gets a few failed tries from each client IP, an IP many more attempts since an exam centre
+# puts whole rooms behind one address. Keying on the IP too keeps a script guessing passwords for
+# sequential admit card ids from locking their candidates out.
+ADMIT_CARD_BUCKET = _bucket('ADMIT_CARD', 5, 5)
+IP_BUCKET = _bucket('IP', 200, 600)
+# The client IP is the socket peer unless it is one of the proxies in FORWARDED_ALLOW_IPS. Behind an
+# untrusted proxy every candidate shares its address, so the bucket is opt-in with LOGIN_IP_BUCKET=true
+# once FORWARDED_ALLOW_IPS lists the proxies in front of the workers.
+IP_BUCKET_ENABLED = os.environ.get('LOGIN_IP_BUCKET', 'false').lower() in ('1', 'true', 'yes')
+UNKNOWN_TTL = int(os.environ.get('LOGIN_UNKNOWN_TTL', 300))
+
+
+class LoginThrottle(AppCRUD):
+    """
+    Token buckets per admit card and client IP, and per client IP, in front of the password check,
+    plus a negative cache of admit card ids that do not exist. All are checked in one round trip.
+    Only failed password checks are charged to the admit card bucket.
+    """
+
+    async def check(self, admit_card_id: int, client_ip: Optional[str]) -> Optional[ServiceResult]:
+        """
+        None when the login attempt may go ahead, otherwise a failed ServiceResult.
+        """
+        keys = [self._admit_card_bucket(admit_card_id, client_ip)]
+        args = [int(time.time() * 1000), *ADMIT_CARD_BUCKET, 0]
+        if client_ip and IP_BUCKET_ENABLED:
+            keys.append(cache_keys.login_bucket('ip', client_ip))
+            args.extend((*IP_BUCKET, 1))
+
+        try:
+            take = self.cache.register_script(TAKE_SCRIPT)
+            async with self.cache.pipeline(transaction=False) as pipe:
+                pipe.exists(cache_keys.login_unknown(admit_card_id))
+                await take(keys=keys, args=args, client=pipe)
+                unknown, wait_ms = await pipe.execute()
+        except Exception as e:
+            # throttling must not lock every candidate out when Redis misbehaves
+            logger.error('Error checking login throttle: %s', e)
+            return None
+
+        if wait_ms:
+            return ServiceResult(AppException.RequestTooManyAttempts(
+                {"ERROR": "Too many login attempts, please retry later", "retry_after": math.ceil(wait_ms / 1000)}))
+        if unknown:
+            return ServiceResult(AppException.RequestAuthenticateItem({"ERROR": "Invalid password"}))
+        return None
+
+    async def charge_failure(self, admit_card_id: int, client_ip: Optional[str]) -> None:
+        """
+        Take a token from the admit card bucket after a failed password check.
+        """
+        try:
+            take = self.cache.register_script(TAKE_SCRIPT)
+            await take(keys=[self._admit_card_bucket(admit_card_id, client_ip)],
+                       args=[int(time.time() * 1000), *ADMIT_CARD_BUCKET, 1])
+        except Exception as e:
+            logger.error('Error charging login throttle: %s', e)
+
+    def _admit_card_bucket(self, admit_card_id: int, client_ip: Optional[str]) -> str:
+        return cache_keys.login_bucket('admit_card', f'{admit_card_id}:{client_ip or "-"}')
+
+    async def mark_unknown(self, admit_card_id: int) -> None:
+        """
+        Remember for LOGIN_UNKNOWN_TTL seconds that admit_card_id does not exist.
+        """
+        await self.cache.set(cache_keys.login_unknown(admit_card_id), 1, ex=UNKNOWN_TTL)
+
+    async def forget_unknown(self, admit_card_id: int) -> None:
+        """
+        Drop the negative entry of a newly created admit card.
+        """
+        await self.cache.delete(cache_keys.login_unknown(admit_card_id))
@@ -1,7 +1,7 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 class DBSessionContext(object):
-    def __init__(self, db: Session, cache=None):
+    def __init__(self, db: AsyncSession, cache=None):
         self.db = db
         self.cache = cache
 
@@ -3,6 +3,7 @@ from app.utils.app_exceptions import AppException
 from app.services.main import AppService, AppCRUD
 from app.utils.service_request import ServiceResult
 from app.utils.hash import hash_password, hmac_sha256
+from app.utils.password import make_password_hash
 
 from fastapi import HTTPException
 from typing import List, Any , Optional, Union
@@ -19,13 +20,14 @@ from app.models.admit_card import AdmitCard as AdmitCardModel
 from app.services.championship import ChampionshipCRUD
 from app.services.profile import ProfileCRUD
 from app.services.admit_card import AdmitCardCRUD
+from app.db import cache_keys
+from app.utils import serializer
 
 
 import logging
 import asyncio
 import datetime
 import os
-import json
 import random
 import string
 import phonenumbers
@@ -34,9 +36,10 @@ import shortuuid
 
 logger = logging.getLogger(__name__)
 
-Cashfree.XClientId = os.getenv('CASHFREE_KEY_ID')
-Cashfree.XClientSecret = os.getenv('CASHFREE_KEY_SECRET')
-Cashfree.XEnvironment = getattr(Cashfree, os.getenv('CASHFREE_ENV'))
+# cashfree-pg 5 takes the environment and credentials per client rather than as class attributes
+cashfree = Cashfree(XEnvironment=getattr(Cashfree, os.getenv('CASHFREE_ENV')),
+                    XClientId=os.getenv('CASHFREE_KEY_ID'),
+                    XClientSecret=os.getenv('CASHFREE_KEY_SECRET'))
 x_api_version = "2023-08-01"
 
 class CashFreeOrderService(AppService):
@@ -56,7 +59,7 @@ class CashFreeOrderService(AppService):
             )
             return ServiceResult(order_base)
         except Exception as e:
-            logger.error(f'Error calculating order: {str(e)}')
+            logger.error('Error calculating order: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"Error": f"Error calculating order: {str(e)}"}))
         
     async def _create_order_id(self, name:str, phone:int, email:str)-> str:
@@ -81,11 +84,11 @@ class CashFreeOrderService(AppService):
 
                 api_response = self._create_cashfree_order(create_order_request)
 
-                self._cache_order_data(order_id, order, profile)
+                await self._cache_order_data(order_id, order, profile)
                 
                 return api_response.data
             except Exception as e:
-                logger.error(f'CashFree:: Error creating order: {str(e)}')
+                logger.error('CashFree:: Error creating order: %s', e)
                 raise ServiceResult(AppException.RequestOrderCreateItem({"ERROR": f"Please Check Your Details!"}))
 
     async def _prepare_order(self, order: OrderCreate, profile: ProfileOrderCreate):
@@ -127,16 +130,16 @@ class CashFreeOrderService(AppService):
         return create_order_request
 
     def _create_cashfree_order(self, create_order_request: CreateOrderRequest):
-        return Cashfree().PGCreateOrder(x_api_version, create_order_request, None, None)
+        return cashfree.PGCreateOrder(x_api_version, create_order_request, None, None)
 
-    def _cache_order_data(self, order_id: str, order: OrderCreate, profile: ProfileOrderCreate):
-        self.cache.set(order_id, json.dumps({
+    async def _cache_order_data(self, order_id: str, order: OrderCreate, profile: ProfileOrderCreate):
+        await self.cache.set(cache_keys.order(order_id), serializer.dumps({
             'championship_id': order.championship_id,
             'examination_ids': order.examination_ids,
             'name': profile.name,
             'phone': profile.phone,
             'email': profile.email
-        }))
+        }), ex=cache_keys.TTL['orders'])
 
     async def create_order(self, order: OrderCreate, profile : ProfileOrderCreate) -> ServiceResult:
         """
@@ -153,12 +156,12 @@ class CashFreeOrderService(AppService):
             
             return ServiceResult({'payment_session_id':cashfree_res.payment_session_id, 'order_id': cashfree_res.order_id})
         except Exception as e:
-            logger.error(f'Error creating order: {str(e)}')
+            logger.error('Error creating order: %s', e)
             raise ServiceResult(AppException.RequestOrderCreateItem( {"ERROR": f"Please Check Your Details"}))
 
     async def capture_order(self, order_id: str) -> ServiceResult:
         try:
-            order = self._get_order_from_cache(order_id)
+            order = await self._get_order_from_cache(order_id)
             if order is None:
                 return ServiceResult(AppException.RequestCreateItem({"ERROR": "Order not found"}))
 
@@ -181,23 +184,23 @@ class CashFreeOrderService(AppService):
             else:
                 return self._handle_failed_payment("No transactions found")
         except Exception as e:
-            logger.error(f'Error capturing order: {str(e)}')
+            logger.error('Error capturing order: %s', e)
             return ServiceResult(AppException.RequestCreateItem({"ERROR": f"Error capturing order: {str(e)}"}))
 
 
-    def _get_order_from_cache(self, order_id: str):
-        return self.cache.get(order_id)
+    async def _get_order_from_cache(self, order_id: str):
+        return await self.cache.get(cache_keys.order(order_id)) or await self.cache.get(cache_keys.legacy_order(order_id))
 
     def _parse_order(self, order):
-        order = json.loads(order)
+        order = serializer.loads(order)
         examination_ids = order['examination_ids']
         return order, examination_ids
 
     def _fetch_order_payments(self, order_id: str):
-        return Cashfree().PGOrderFetchPayments(x_api_version, order_id, None).data
+        return cashfree.PGOrderFetchPayments(x_api_version, order_id, None).data
 
     async def _handle_successful_payment(self, order_id: str, order, examination_ids:list):
-        logger.info(f'Order captured: {order_id}')
+        logger.info('Order captured: %s', order_id)
 
         password = self._generate_random_password()
         profile = await ProfileCRUD(self.db).create_inital_profile(order)
@@ -208,18 +211,18 @@ class CashFreeOrderService(AppService):
         return ServiceResult(admitcard)
 
     async def _handle_pending_payment(self, order_id: str):
-        logger.error(f'Payment Pending for: {order_id}')
+        logger.error('Payment Pending for: %s', order_id)
         raise HTTPException(status_code=202, detail=f'Payment Pending for: {order_id}')
 
     def _handle_failed_payment(self, payment_status: str):
-        logger.error(f'Payment failed with status: {payment_status}')
+        logger.error('Payment failed with status: %s', payment_status)
         raise HTTPException(status_code=400, detail=f'Payment failed with status: {payment_status}')
 
     def _generate_random_password(self):
         return ''.join(random.choices(string.digits, k=6))
 
     async def create_admit_card(self, order_id: str, order, examination_ids, password, profile_id: int):
-        password_hash = await hash_password(password)
+        password_hash = await make_password_hash(password)
         admitcard_data = {
             "order_id": order_id,
             "password_hash": password_hash
@@ -230,7 +233,7 @@ class CashFreeOrderService(AppService):
             examination_ids=order['examination_ids'], 
             item=admitcard_data
         )
-        logger.info(f'Admit card created: {str(_admitcard)}')
+        logger.info('Admit card created: %s', _admitcard)
         return AdmitCard(
             id=_admitcard.id,
             order_id=_admitcard.order_id,
@@ -2,7 +2,8 @@ from app.utils.app_exceptions import AppException
 
 from app.services.main import AppService, AppCRUD
 from app.utils.service_request import ServiceResult
-from app.utils.hash import hash_password, hmac_sha256
+from app.utils.hash import hmac_sha256
+from app.utils.password import make_password_hash
 
 from sqlalchemy import asc, desc, and_
 from typing import List, Any , Optional, Union
@@ -14,6 +15,8 @@ from app.models.admit_card import AdmitCard as AdmitCardModel
 from app.services.championship import ChampionshipCRUD
 from app.services.profile import ProfileCRUD
 from app.services.admit_card import AdmitCardCRUD
+from app.db import cache_keys
+from app.utils import serializer
 
 
 import logging
@@ -44,7 +47,7 @@ class RazorPayOrderService(AppService):
             )
             return ServiceResult(order_base)
         except Exception as e:
-            logger.error(f'Error calculating order: {str(e)}')
+            logger.error('Error calculating order: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"Error": f"Error calculating order: {str(e)}"}))
 
     async def create_order(self, order: OrderCreate) -> ServiceResult:
@@ -88,22 +91,22 @@ class RazorPayOrderService(AppService):
                     currency = res['currency']
                 )
                 # add the order to the cache
-                self.cache.set( order_base.order_id, json.dumps(payload))
+                await self.cache.set(cache_keys.order(order_base.order_id), serializer.dumps(payload), ex=cache_keys.TTL['orders'])
                 return ServiceResult(order_base)
             else:
                 return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating order: {req.text}"}))
         except Exception as e:
-            logger.error(f'Error creating order: {str(e)}')
+            logger.error('Error creating order: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating order: {str(e)}"}))
 
     async def capture_order(self, order_id: str, order_details: OrderCapture) -> ServiceResult:
         try:
             #get the order from the cache
-            order = self.cache.get( order_id)
+            order = await self.cache.get(cache_keys.order(order_id)) or await self.cache.get(cache_keys.legacy_order(order_id))
             if order is None:
                 return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Order not found"}))
 
-            order = json.loads(order)
+            order = serializer.loads(order)
             notes = json.loads(order['notes'])
             examination_ids =  [int(id) for id in notes['examination_ids'].split(",")]
 
@@ -112,7 +115,7 @@ class RazorPayOrderService(AppService):
             if generated_signature != order_details.signature:
                 return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Signature mismatch"}))
 
-            logger.info(f'Order verified: {order_id} {order_details.payment_id} {order_details.signature}')
+            logger.info('Order verified: %s %s %s', order_id, order_details.payment_id, order_details.signature)
 
             #capture order
             payload = {
@@ -131,7 +134,7 @@ class RazorPayOrderService(AppService):
             if req.status_code != 200:
                 return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error capturing order: {req.text}"}))
 
-            logger.info(f'Order captured: {order_id} {order_details.payment_id} {order_details.signature} {res['contact']}')
+            logger.info('Order captured: %s %s %s %s', order_id, order_details.payment_id, order_details.signature, res['contact'])
 
             #create a random 6 letter and digits combined password
             password = ''.join(random.choices(string.digits, k=6))
@@ -144,10 +147,10 @@ class RazorPayOrderService(AppService):
             #create the admit card
             admitcard = {
                 "order_id": order_id,
-                "password_hash": await hash_password(password)
+                "password_hash": await make_password_hash(password)
             }
             _admitcard = await AdmitCardCRUD(self.db).create( profile_id=profile.id, championship_id=int(notes['championship']), examination_ids=examination_ids, item=admitcard)
-            logger.info(f'Admit card created: {str(_admitcard)}')
+            logger.info('Admit card created: %s', _admitcard)
             admitcard = AdmitCard(
                 id = _admitcard.id,
                 order_id = _admitcard.order_id,
@@ -160,5 +163,5 @@ class RazorPayOrderService(AppService):
             return ServiceResult(admitcard)
 
         except Exception as e:
-            logger.error(f'Error capturing order: {str(e)}')
+            logger.error('Error capturing order: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error capturing order: {str(e)}"}))
@@ -6,7 +6,7 @@ from app.utils.service_request import ServiceResult
 from app.models.profile import Profile as ProfileModel
 from app.schemas.profile import Profile as ProfileSchema
 
-from sqlalchemy import asc, desc, and_
+from sqlalchemy import asc, desc, and_, select, delete
 from typing import List, Any , Optional, Union
 
 import logging
@@ -25,7 +25,7 @@ class ProfileService(AppService):
             result = await ProfileCRUD(self.db).get_all(ProfileModel, skip=skip, limit=limit)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving profiles: {str(e)}')
+            logger.error('Error retrieving profiles: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving profiles: {str(e)}"}))
 
     async def create_profile(self, profile: ProfileSchema) -> ServiceResult:
@@ -36,7 +36,7 @@ class ProfileService(AppService):
             result = await ProfileCRUD(self.db).create(ProfileModel, profile)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error creating profile: {str(e)}')
+            logger.error('Error creating profile: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating profile: {str(e)}"}))
     
     async def get_profile(self, profile_id: int) -> ServiceResult:
@@ -47,7 +47,7 @@ class ProfileService(AppService):
             result = await ProfileCRUD(self.db).get(ProfileModel, profile_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving profile: {str(e)}')
+            logger.error('Error retrieving profile: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving profile: {str(e)}"}))
 
     async def update_profile(self, profile_id: int, profile: ProfileSchema) -> ServiceResult:
@@ -58,7 +58,7 @@ class ProfileService(AppService):
             result = await ProfileCRUD(self.db).update(ProfileModel, profile_id, profile)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error updating profile: {str(e)}')
+            logger.error('Error updating profile: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating profile: {str(e)}"}))
 
     async def delete_profile(self, profile_id: int) -> ServiceResult:
@@ -69,7 +69,7 @@ class ProfileService(AppService):
             result = await ProfileCRUD(self.db).delete(ProfileModel, profile_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error deleting profile: {str(e)}')
+            logger.error('Error deleting profile: %s', e)
             return ServiceResult(AppException.RequestDeleteItem( {"ERROR": f"Error deleting profile: {str(e)}"}))
 
 class ProfileCRUD(AppCRUD):
@@ -79,13 +79,13 @@ class ProfileCRUD(AppCRUD):
         Retrieve all profiles.
         """
         try:
-            query = self.db.query(model)
+            query = select(model)
             if filters:
                 query = query.filter(and_(*filters))
-            result = query.order_by(asc(model.id)).offset(skip).limit(limit).all()
+            result = (await self.db.scalars(query.order_by(asc(model.id)).offset(skip).limit(limit))).all()
             return result
         except Exception as e:
-            logger.error(f'Error retrieving profiles: {str(e)}')
+            logger.error('Error retrieving profiles: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving profiles: {str(e)}"})
         
     async def create_inital_profile(self, order):
@@ -105,12 +105,12 @@ class ProfileCRUD(AppCRUD):
                 guardian_name = ""
             )
             self.db.add(new_profile)
-            self.db.commit()
-            self.db.refresh(new_profile)
+            await self.db.commit()
+            await self.db.refresh(new_profile)
 
             return new_profile
         except Exception as e:
-            logger.error(f'Error creating initial profile: {str(e)}')
+            logger.error('Error creating initial profile: %s', e)
             return AppException.RequestCreateItem( {"ERROR": f"Error creating initial profile: {str(e)}"})
 
 
@@ -119,13 +119,13 @@ class ProfileCRUD(AppCRUD):
         Create new profile.
         """
         try:
-            new_profile = model(**profile.dict())
+            new_profile = model(**profile.model_dump())
             self.db.add(new_profile)
-            self.db.commit()
-            self.db.refresh(new_profile)
+            await self.db.commit()
+            await self.db.refresh(new_profile)
             return new_profile
         except Exception as e:
-            logger.error(f'Error creating profile: {str(e)}')
+            logger.error('Error creating profile: %s', e)
             return AppException.RequestCreateItem( {"ERROR": f"Error creating profile: {str(e)}"})
 
     async def get(self,  profile_id: int,model= ProfileModel) -> ProfileModel:
@@ -133,10 +133,10 @@ class ProfileCRUD(AppCRUD):
         Retrieve profile.
         """
         try:
-            result = self.db.query(model).filter(model.id == profile_id).first()
+            result = await self.db.scalar(select(model).filter(model.id == profile_id))
             return result
         except Exception as e:
-            logger.error(f'Error retrieving profile: {str(e)}')
+            logger.error('Error retrieving profile: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving profile: {str(e)}"})
 
     async def update(self, id: int, schema ,model= ProfileModel) -> ProfileModel:
@@ -145,20 +145,20 @@ class ProfileCRUD(AppCRUD):
         """
         try:
             # Get the existing record
-            record = self.db.query(model).filter(model.id == id).first()
+            record = await self.db.scalar(select(model).filter(model.id == id))
             if not record:
                 raise ValueError("Record not found")
 
             # Update the record with the new values
-            for field, value in schema.dict().items():
+            for field, value in schema.model_dump().items():
                 if hasattr(record, field):
                     setattr(record, field, value)
 
-            self.db.commit()
-            self.db.refresh(record)
+            await self.db.commit()
+            await self.db.refresh(record)
             return record
         except Exception as e:
-            logger.error(f'Error updating profile: {str(e)}')
+            logger.error('Error updating profile: %s', e)
             return AppException.RequestUpdateItem( {"ERROR": f"Error updating profile: {str(e)}"})
 
     async def delete(self, model: ProfileModel, profile_id: int) -> ProfileModel:
@@ -166,11 +166,11 @@ class ProfileCRUD(AppCRUD):
         Delete profile.
         """
         try:
-            result = self.db.query(model).filter(model.id == profile_id).delete()
-            self.db.commit()
-            return result
+            result = await self.db.execute(delete(model).filter(model.id == profile_id))
+            await self.db.commit()
+            return result.rowcount
         except Exception as e:
-            logger.error(f'Error deleting profile: {str(e)}')
+            logger.error('Error deleting profile: %s', e)
             return AppException.RequestDeleteItem( {"ERROR": f"Error deleting profile: {str(e)}"})
 
 
@@ -7,7 +7,7 @@ from app.models.question import Question as QuestionModel
 from app.models.question_attempt import QuestionAttempt as QuestionAttemptModel
 from app.schemas.question import Question as QuestionSchema
 
-from sqlalchemy import asc, desc, and_
+from sqlalchemy import asc, desc, and_, select
 from sqlalchemy.dialects.postgresql import insert
 from typing import List, Any , Optional, Union
 
@@ -36,26 +36,73 @@ class QuestionAttemptCRUD(AppCRUD):
             stmt = insert(model).values(**values_to_insert).on_conflict_do_update(
                 index_elements=['admit_card_id','question_id'],
                 set_=values_to_update
-            )
-            result = self.db.execute(stmt)
-            self.db.commit()
-            return self.db.query(model).filter(and_(model.admit_card_id == admit_card_id, model.question_id ==  question_id)).first()
+            ).returning(model)
+            # RETURNING hands back the stored row, no follow-up SELECT needed
+            result = await self.db.scalars(stmt, execution_options={'populate_existing': True})
+            question_attempt = result.first()
+            await self.db.commit()
+            return question_attempt
         except Exception as e:
-            self.db.rollback()  # Rollback in case of error
-            logger.error(f'Error upserting question: {str(e)}')
+            await self.db.rollback()  # Rollback in case of error
+            logger.error('Error upserting question: %s', e)
             raise AppException.RequestUpdateItem({"ERROR": f"Error upserting question: {str(e)}"})
 
+    async def bulk_upsert(self, model, admit_card_id: int, answers: dict) -> List[QuestionAttemptModel]:
+        """
+        Upsert many answers of one admit card with a single multi-row statement.
+        answers maps question_id to answer.
+        """
+        try:
+            stmt = insert(model).values([
+                {
+                    'admit_card_id' : admit_card_id,
+                    'question_id' : question_id,
+                    'answer' : answer
+                }
+                for question_id, answer in answers.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['admit_card_id','question_id'],
+                set_={'answer' : stmt.excluded.answer}
+            ).returning(model)
+            result = await self.db.scalars(stmt, execution_options={'populate_existing': True})
+            question_attempts = result.all()
+            await self.db.commit()
+            return question_attempts
+        except Exception as e:
+            await self.db.rollback()  # Rollback in case of error
+            logger.error('Error upserting questions: %s', e)
+            raise AppException.RequestUpdateItem({"ERROR": f"Error upserting questions: {str(e)}"})
+
+    async def upsert_many(self, model, rows: List[dict]) -> None:
+        """
+        Upsert answers of any number of admit cards in one statement.
+        rows are dicts of admit_card_id, question_id and answer, unique per (admit_card_id, question_id).
+        """
+        try:
+            stmt = insert(model).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['admit_card_id','question_id'],
+                set_={'answer' : stmt.excluded.answer}
+            )
+            await self.db.execute(stmt)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()  # Rollback in case of error
+            logger.error('Error upserting questions: %s', e)
+            raise AppException.RequestUpdateItem({"ERROR": f"Error upserting questions: {str(e)}"})
+
     async def get_all(self, skip: int = 0, limit: int = 100, filters: Optional[List[Any]] = None, model = QuestionAttemptModel) -> QuestionAttemptModel:
         """
         Retrieve all examinations.
         """
         try:
-            query = self.db.query(model)
+            query = select(model)
             if filters:
                 query = query.filter(*filters)
-            return query.order_by(asc(model.id)).offset(skip).limit(limit).all()
+            return (await self.db.scalars(query.order_by(asc(model.id)).offset(skip).limit(limit))).all()
         except Exception as e:
-            logger.error(f'Error retrieving Question Attempts: {str(e)}')
+            logger.error('Error retrieving Question Attempts: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving question attempts: {str(e)}"})
 
     async def create(self, model, examination_id: int, question: QuestionSchema) -> QuestionAttemptModel:
@@ -63,13 +110,13 @@ class QuestionAttemptCRUD(AppCRUD):
         Create new question.
         """
         try:
-            question = model(examination_id=examination_id, **question.dict())
+            question = model(examination_id=examination_id, **question.model_dump())
             self.db.add(question)
-            self.db.commit()
-            self.db.refresh(question)
+            await self.db.commit()
+            await self.db.refresh(question)
             return question
         except Exception as e:
-            logger.error(f'Error creating question: {str(e)}')
+            logger.error('Error creating question: %s', e)
             return AppException.RequestCreateItem( {"ERROR": f"Error creating question: {str(e)}"})
 
     async def get(self,  question_id: int, admit_card_id:int,model= QuestionAttemptModel ) -> QuestionAttemptModel:
@@ -77,11 +124,11 @@ class QuestionAttemptCRUD(AppCRUD):
         Retrieve question by id.
         """
         try:
-            res =  self.db.query(model).filter(and_(model.question_id == question_id, model.admit_card_id == admit_card_id)).first()
+            res =  await self.db.scalar(select(model).filter(and_(model.question_id == question_id, model.admit_card_id == admit_card_id)))
             # print(f'res {res}')
             return res
         except Exception as e:
-            logger.error(f'Error retrieving question: {str(e)}')
+            logger.error('Error retrieving question: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving question: {str(e)}"})
 
     async def update(self, model, id: int, schema) -> QuestionAttemptModel:
@@ -89,20 +136,20 @@ class QuestionAttemptCRUD(AppCRUD):
         Update question by id.
         """
         try:
-            record = self.db.query(model).filter(model.id == id).first()
+            record = await self.db.scalar(select(model).filter(model.id == id))
             if not record:
                 raise ValueError("Record not found")
 
             # Update the record with the new values
-            for field, value in schema.dict().items():
+            for field, value in schema.model_dump().items():
                 if hasattr(record, field):
                     setattr(record, field, value)
 
-            self.db.commit()
-            self.db.refresh(record)
+            await self.db.commit()
+            await self.db.refresh(record)
             return record
         except Exception as e:
-            logger.error(f'Error updating question: {str(e)}')
+            logger.error('Error updating question: %s', e)
             return AppException.RequestUpdateItem( {"ERROR": f"Error updating question: {str(e)}"})
 
     async def delete(self, model, id: int) -> bool:
@@ -110,11 +157,11 @@ class QuestionAttemptCRUD(AppCRUD):
         Delete question by id.
         """
         try:
-            question = self.db.query(model).filter(model.id == id).first()
-            self.db.delete(question)
-            self.db.commit()
+            question = await self.db.scalar(select(model).filter(model.id == id))
+            await self.db.delete(question)
+            await self.db.commit()
             return True
         except Exception as e:
-            logger.error(f'Error deleting question: {str(e)}')
+            logger.error('Error deleting question: %s', e)
             return AppException.RequestDeleteItem( {"ERROR": f"Error deleting question: {str(e)}"})
         
@@ -6,12 +6,18 @@ from app.utils.service_request import ServiceResult
 from app.models.queschoice import QuesChoice as QuesChoiceModel
 from app.schemas.queschoice import QuesChoice as QuesChoiceSchema
 
-from sqlalchemy import asc, desc, and_
+from app.db.local_cache import get_local_cache
+from app.db.invalidation import invalidate
+from app.db import cache_keys
+from app.db.single_flight import fetch_json_once
+
+from sqlalchemy import asc, desc, and_, select
 from typing import List, Any , Optional, Union
 
 import logging
 import requests
 import datetime
+import json
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +31,7 @@ class QuesChoiceService(AppService):
             result = await QuesChoiceCRUD(self.db).get_all(QuesChoiceModel, skip=skip, limit=limit)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving queschoices: {str(e)}')
+            logger.error('Error retrieving queschoices: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving queschoices: {str(e)}"}))
 
     async def create_queschoice(self, question_id: int, queschoice: QuesChoiceSchema) -> ServiceResult:
@@ -36,7 +42,7 @@ class QuesChoiceService(AppService):
             result = await QuesChoiceCRUD(self.db).create(QuesChoiceModel,question_id, queschoice)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error creating queschoice: {str(e)}')
+            logger.error('Error creating queschoice: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating queschoice: {str(e)}"}))
 
     async def get_queschoice(self, queschoice_id: int) -> ServiceResult:
@@ -47,7 +53,7 @@ class QuesChoiceService(AppService):
             result = await QuesChoiceCRUD(self.db).get(QuesChoiceModel, queschoice_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving queschoice: {str(e)}')
+            logger.error('Error retrieving queschoice: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving queschoice: {str(e)}"}))
     
     async def update_queschoice(self, queschoice_id: int, queschoice: QuesChoiceSchema) -> ServiceResult:
@@ -58,7 +64,7 @@ class QuesChoiceService(AppService):
             result = await QuesChoiceCRUD(self.db).update(QuesChoiceModel, queschoice_id, queschoice)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error updating queschoice: {str(e)}')
+            logger.error('Error updating queschoice: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating queschoice: {str(e)}"}))
 
     async def delete_queschoice(self, queschoice_id: int) -> ServiceResult:
@@ -69,7 +75,7 @@ class QuesChoiceService(AppService):
             result = await QuesChoiceCRUD(self.db).delete(QuesChoiceModel, queschoice_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error deleting queschoice: {str(e)}')
+            logger.error('Error deleting queschoice: %s', e)
             return ServiceResult(AppException.RequestDeleteItem( {"ERROR": f"Error deleting queschoice: {str(e)}"}))
 
     async def get_queschoices_by_question(self, question_id: int) -> ServiceResult:
@@ -77,12 +83,25 @@ class QuesChoiceService(AppService):
         Retrieve queschoices for question.
         """
         try:
-            result = await QuesChoiceCRUD(self.db).get_all(QuesChoiceModel, filters=[QuesChoiceModel.question_id == question_id])
+            result = await self._get_cached_or_fetched_choices(question_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving queschoices for question: {str(e)}')
+            logger.error('Error retrieving queschoices for question: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving queschoices for question: {str(e)}"}))
 
+    async def _get_cached_or_fetched_choices(self, question_id: int):
+        local_choices = get_local_cache('question_choices')
+        choices = local_choices.get(question_id)
+        if choices is not None:
+            return choices
+
+        async def fetch(db):
+            return [choice.as_dict() for choice in await QuesChoiceCRUD(db).get_all(QuesChoiceModel, filters=[QuesChoiceModel.question_id == question_id])]
+
+        choices = await fetch_json_once(self.cache, cache_keys.question_choices(question_id), cache_keys.TTL['question_choices'], fetch)
+        local_choices.set(question_id, choices)
+        return choices
+
 class QuesChoiceCRUD(AppCRUD):
 
     async def get_all(self, model, skip: int = 0, limit: int = 100, filters: Optional[List[Any]] = None):
@@ -90,13 +109,13 @@ class QuesChoiceCRUD(AppCRUD):
         Retrieve all queschoices.
         """
         try:
-            query = self.db.query(model)
+            query = select(model)
             if filters:
                 query = query.filter(*filters)
-            return  query.order_by(asc(model.id)).offset(skip).limit(limit).all()
+            return  (await self.db.scalars(query.order_by(asc(model.id)).offset(skip).limit(limit))).all()
 
         except Exception as e:
-            logger.error(f'Error retrieving queschoices: {str(e)}')
+            logger.error('Error retrieving queschoices: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving queschoices: {str(e)}"})
 
 
@@ -105,13 +124,14 @@ class QuesChoiceCRUD(AppCRUD):
         Create new queschoice.
         """
         try:
-            new_queschoice = model(**schema.dict(), question_id=question_id)
+            new_queschoice = model(**schema.model_dump(), question_id=question_id)
             self.db.add(new_queschoice)
-            self.db.commit()
-            self.db.refresh(new_queschoice)
+            await self.db.commit()
+            await self.db.refresh(new_queschoice)
+            await invalidate(('question_choices', question_id))
             return new_queschoice
         except Exception as e:
-            logger.error(f'Error creating queschoice: {str(e)}')
+            logger.error('Error creating queschoice: %s', e)
             return AppException.RequestCreateItem( {"ERROR": f"Error creating queschoice: {str(e)}"})   
 
     async def get(self, model, queschoice_id: int):
@@ -119,9 +139,9 @@ class QuesChoiceCRUD(AppCRUD):
         Retrieve queschoice.
         """
         try:
-            return  self.db.query(model).filter(model.id == queschoice_id).first()
+            return  await self.db.scalar(select(model).filter(model.id == queschoice_id))
         except Exception as e:
-            logger.error(f'Error retrieving queschoice: {str(e)}')
+            logger.error('Error retrieving queschoice: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving queschoice: {str(e)}"})
 
     async def update(self, model, queschoice_id: int, schema: QuesChoiceSchema):
@@ -129,14 +149,15 @@ class QuesChoiceCRUD(AppCRUD):
         Update queschoice.
         """
         try:
-            queschoice =  self.db.query(model).filter(model.id == queschoice_id).first()
-            for key, value in schema.dict().items():
+            queschoice =  await self.db.scalar(select(model).filter(model.id == queschoice_id))
+            for key, value in schema.model_dump().items():
                 setattr(queschoice, key, value)
-            self.db.commit()
-            self.db.refresh(queschoice)
+            await self.db.commit()
+            await self.db.refresh(queschoice)
+            await invalidate(('question_choices', queschoice.question_id))
             return queschoice
         except Exception as e:
-            logger.error(f'Error updating queschoice: {str(e)}')
+            logger.error('Error updating queschoice: %s', e)
             return AppException.RequestUpdateItem( {"ERROR": f"Error updating queschoice: {str(e)}"})
 
     async def delete(self, model, queschoice_id: int):
@@ -144,10 +165,11 @@ class QuesChoiceCRUD(AppCRUD):
         Delete queschoice.
         """
         try:
-            queschoice =  self.db.query(model).filter(model.id == queschoice_id).first()
-            self.db.delete(queschoice)
-            self.db.commit()
+            queschoice =  await self.db.scalar(select(model).filter(model.id == queschoice_id))
+            await self.db.delete(queschoice)
+            await self.db.commit()
+            await invalidate(('question_choices', queschoice.question_id))
             return True
         except Exception as e:
-            logger.error(f'Error deleting queschoice: {str(e)}')
+            logger.error('Error deleting queschoice: %s', e)
             return AppException.RequestDeleteItem( {"ERROR": f"Error deleting queschoice: {str(e)}"})
\ No newline at end of file
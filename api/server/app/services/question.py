@@ -6,18 +6,27 @@ from app.utils.service_request import ServiceResult
 
 from app.models.question import Question as QuestionModel
 from app.models.question_attempt import QuestionAttempt as QuestionAttemptModel
-from app.schemas.question import Question as QuestionSchema
+from app.schemas.question import Question as QuestionSchema, QuestionAnswer, QuestionAuthList
 from app.services.ques_attempt import QuestionAttemptCRUD
 from app.services.exam_attempt import ExamAttemptCRUD
-
-from sqlalchemy import asc, desc, and_
+from app.services import answer_buffer
+from app.services.answer_buffer import AnswerBuffer
+from app.services.answer_sheet import AnswerSheet
+from app.db.local_cache import get_local_cache
+from app.db.invalidation import invalidate_examination, examination_version
+from app.db import cache_keys
+from app.db.single_flight import fetch_json_once
+from app.utils.etag import digest, make_etag
+from app.utils import serializer
+
+from sqlalchemy import asc, desc, and_, select
 from sqlalchemy.dialects.postgresql import insert
 from typing import List, Any , Optional, Union
 
 import logging
 import requests
-import json
 import asyncio
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +41,7 @@ class QuestionService(AppService):
             result = await QuestionCRUD(self.db).get_all(QuestionModel, skip=skip, limit=limit)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error retrieving questions: {str(e)}')
+            logger.error('Error retrieving questions: %s', e)
             return ServiceResult(AppException.RequestGetItem( {"ERROR": f"Error retrieving questions: {str(e)}"}))
 
     async def create_question(self, examination_id: int, question: QuestionSchema) -> ServiceResult:
@@ -43,7 +52,7 @@ class QuestionService(AppService):
             result = await QuestionCRUD(self.db).create(QuestionModel,examination_id, question)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error creating question: {str(e)}')
+            logger.error('Error creating question: %s', e)
             return ServiceResult(AppException.RequestCreateItem( {"ERROR": f"Error creating question: {str(e)}"}))
 
     async def get_question(self, question_id: int, admit_card_id: int) -> ServiceResult:
@@ -51,26 +60,19 @@ class QuestionService(AppService):
         Retrieve question.
         """
         try:
-            # Retrieve cached question if available
-            question_json = self.cache.hget('questions', question_id)
-            if question_json:
-                question = json.loads(question_json)
-            else:
-                # If not in cache, fetch from database and cache the result
-                question_obj = await QuestionCRUD(self.db).get(QuestionModel, question_id)
-                if question_obj is None:
-                    return ServiceResult(AppException.RequestGetItem({"ERROR": "Question not found"}))
-                question = question_obj.as_dict()
-                self.cache.hset('questions', question_id, json.dumps(question, default=str))
+            question = await self._get_cached_or_fetched_question(question_id)
+            if question is None:
+                return ServiceResult(AppException.RequestGetItem({"ERROR": "Question not found"}))
 
-            # Retrieve the question attempt
-            question_attempt = await QuestionAttemptCRUD(self.db).get(question_id, admit_card_id)
-            answer = question_attempt.answer if question_attempt else None
+            # Retrieve the answer from the candidate's answer sheet
+            examination_questions = await self._get_cached_or_fetched_questions(question['examination_id'])
+            ques_id_vs_answers = await self._get_answers(question['examination_id'], admit_card_id,
+                                                         [examination_question['id'] for examination_question in examination_questions])
 
             # Return the question with the answer
-            return ServiceResult({**question, 'answer': answer})
+            return ServiceResult({**question, 'answer': ques_id_vs_answers.get(question_id)})
         except Exception as e:
-            logger.error(f'Error retrieving question: {str(e)}')
+            logger.error('Error retrieving question: %s', e)
             return ServiceResult(AppException.RequestGetItem({"ERROR": f"Error retrieving question: {str(e)}"}))
 
 
@@ -80,12 +82,62 @@ class QuestionService(AppService):
         """
 
         try:
-            _ = await QuestionAttemptCRUD(self.db).upsert(QuestionAttemptModel, question_id, admit_card_id, answer)
-            return await self.get_question(question_id, admit_card_id)
+            question = await self._get_cached_or_fetched_question(question_id)
+            if question is None:
+                return ServiceResult(AppException.RequestGetItem({"ERROR": "Question not found"}))
+
+            if answer_buffer.enabled():
+                await AnswerBuffer(self.db, self.cache).put(admit_card_id, {question_id: answer})
+                await AnswerSheet(self.db, self.cache).record(question['examination_id'], admit_card_id, {question_id: answer})
+                return ServiceResult({**question, 'answer': answer})
+
+            # the upsert returns the stored attempt, so the response needs no further query
+            question_attempt = await QuestionAttemptCRUD(self.db).upsert(QuestionAttemptModel, question_id, admit_card_id, answer)
+            await AnswerSheet(self.db, self.cache).record(question['examination_id'], admit_card_id, {question_id: question_attempt.answer})
+            return ServiceResult({**question, 'answer': question_attempt.answer})
         except Exception as e:
-            logger.error(f'Error updating question: {str(e)}')
+            logger.error('Error updating question: %s', e)
             return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating question: {str(e)}"}))
+
+    async def answer_questions(self, examination_id: int, admit_card_id: int, answers: List[QuestionAnswer]) -> ServiceResult:
+        """
+        Update several questions of an examination with one upsert.
+        """
+        try:
+            questions = {question['id']: question for question in await self._get_cached_or_fetched_questions(examination_id)}
+
+            # the last answer wins when a question is repeated in the batch
+            answers_by_question = {item.question_id: item.answer for item in answers}
+            unknown_ids = [question_id for question_id in answers_by_question if question_id not in questions]
+            if unknown_ids:
+                return ServiceResult(AppException.RequestGetItem({"ERROR": f"Questions not found in examination: {unknown_ids}"}))
+            if not answers_by_question:
+                return ServiceResult([])
+
+            if answer_buffer.enabled():
+                await AnswerBuffer(self.db, self.cache).put(admit_card_id, answers_by_question)
+                await AnswerSheet(self.db, self.cache).record(examination_id, admit_card_id, answers_by_question)
+                return ServiceResult([{**questions[question_id], 'answer': answer} for question_id, answer in answers_by_question.items()])
+
+            question_attempts = await QuestionAttemptCRUD(self.db).bulk_upsert(QuestionAttemptModel, admit_card_id, answers_by_question)
+            stored_answers = {attempt.question_id: attempt.answer for attempt in question_attempts}
+            await AnswerSheet(self.db, self.cache).record(examination_id, admit_card_id, stored_answers)
+            return ServiceResult([{**questions[question_id], 'answer': stored_answers.get(question_id)} for question_id in answers_by_question])
+        except Exception as e:
+            logger.error('Error updating questions: %s', e)
+            return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating questions: {str(e)}"}))
         
+    async def update_question(self, question_id: int, question: QuestionSchema) -> ServiceResult:
+        """
+        Update question content.
+        """
+        try:
+            result = await QuestionCRUD(self.db).update(QuestionModel, question_id, question)
+            return ServiceResult(result)
+        except Exception as e:
+            logger.error('Error updating question: %s', e)
+            return ServiceResult(AppException.RequestUpdateItem( {"ERROR": f"Error updating question: {str(e)}"}))
+
     async def delete_question(self, question_id: int) -> ServiceResult:
         """
         Delete question.
@@ -94,7 +146,7 @@ class QuestionService(AppService):
             result = await QuestionCRUD(self.db).delete(QuestionModel, question_id)
             return ServiceResult(result)
         except Exception as e:
-            logger.error(f'Error deleting question: {str(e)}')
+            logger.error('Error deleting question: %s', e)
             return ServiceResult(AppException.RequestDeleteItem( {"ERROR": f"Error deleting question: {str(e)}"}))
 
     async def get_examination_questions(self, examination_id: int, admit_card_id: int) -> ServiceResult:
@@ -103,43 +155,113 @@ class QuestionService(AppService):
         """
         try:
             questions_dict =  await self._get_cached_or_fetched_questions(examination_id)
-            ques_id_vs_ques_attempts = await self._get_question_attempts(admit_card_id, 
-                                                                         list(map(lambda x: x['id'], questions_dict)))
-            merged_questions = self._merge_questions_with_attempts(questions_dict, ques_id_vs_ques_attempts)
+            ques_id_vs_answers = await self._get_answers(examination_id, admit_card_id, list(map(lambda x: x['id'], questions_dict)))
+            merged_questions = self._merge_questions_with_attempts(questions_dict, ques_id_vs_answers)
 
             return ServiceResult(merged_questions)
         except Exception as e:
-            logger.error(f"Error retrieving questions for examination: {str(e)}")
+            logger.error("Error retrieving questions for examination: %s", e)
             return ServiceResult(AppException.RequestGetItem({"ERROR": f"Error retrieving questions for examination: {str(e)}"}))
 
+    async def get_examination_questions_json(self, examination_id: int, admit_card_id: int) -> ServiceResult:
+        """
+        Retrieve questions for examination as an encoded JSON list of QuestionAuth.
+        """
+        try:
+            questions_dict = await self._get_cached_or_fetched_questions(examination_id)
+            encoded_questions, _ = self._get_encoded_questions(examination_id, questions_dict)
+            ques_id_vs_answers = await self._get_answers(examination_id, admit_card_id, [question_id for question_id, _ in encoded_questions])
+
+            # only the answers are encoded per request, the questions are spliced in as bytes
+            return ServiceResult(b'[' + b','.join(
+                prefix + serializer.dumps(ques_id_vs_answers.get(question_id)) + b'}'
+                for question_id, prefix in encoded_questions
+            ) + b']')
+        except Exception as e:
+            logger.error("Error retrieving questions for examination: %s", e)
+            return ServiceResult(AppException.RequestGetItem({"ERROR": f"Error retrieving questions for examination: {str(e)}"}))
+
+    async def _get_cached_or_fetched_question(self, question_id: int):
+        # Exam content is the same for every candidate, so this worker's copy is tried first
+        local_questions = get_local_cache('questions')
+        question = local_questions.get(question_id)
+        if question is not None:
+            return question
+
+        # Then Redis, on a miss one request fetches from database and caches the result
+        async def fetch(db):
+            question_obj = await QuestionCRUD(db).get(QuestionModel, question_id)
+            return question_obj.as_dict() if question_obj is not None else None
+
+        question = await fetch_json_once(self.cache, cache_keys.question(question_id), cache_keys.TTL['questions'], fetch)
+        if question is not None:
+            local_questions.set(question_id, question)
+        return question
+
     async def _get_cached_or_fetched_questions(self, examination_id: int):
-        questions_json = self.cache.hget('examination_questions', examination_id)
-        if questions_json:
-            return json.loads(questions_json)
-
-        questions = await QuestionCRUD(self.db).get_all(
-            QuestionModel, 
-            filters=[QuestionModel.examination_id == examination_id]
-        )
-        questions_dict = [question.as_dict() for question in questions]
-        self.cache.hset('examination_questions', examination_id, json.dumps(questions_dict, default=str))
-        return questions_dict
+        local_questions = get_local_cache('examination_questions')
+        questions_dict = local_questions.get(examination_id)
+        if questions_dict is not None:
+            return questions_dict
+
+        async def fetch(db):
+            questions = await QuestionCRUD(db).get_all(
+                QuestionModel, 
+                filters=[QuestionModel.examination_id == examination_id]
+            )
+            return [question.as_dict() for question in questions]
 
-    async def _get_question_attempts(self, admit_card_id: int, question_ids: List[int]):
-        attempts = await QuestionAttemptCRUD(self.db).get_all(
-            filters=[QuestionAttemptModel.admit_card_id == admit_card_id,
-                     QuestionAttemptModel.question_id.in_(question_ids)
-                     ]
-        )
-        return {attempt.question_id: attempt for attempt in attempts}
+        key = cache_keys.examination_questions(examination_id, await examination_version(self.cache, examination_id))
+        questions_dict = await fetch_json_once(self.cache, key, cache_keys.TTL['examination_questions'], fetch)
+        local_questions.set(examination_id, questions_dict)
+        return questions_dict
 
-    def _merge_questions_with_attempts(self, questions_dict, ques_id_vs_ques_attempts):
+    async def get_examination_questions_etag(self, examination_id: int, admit_card_id: int) -> ServiceResult:
+        """
+        ETag of the question list of a candidate, built from the question list digest and the
+        answer sheet version, so it is answered from the caches alone.
+        """
+        try:
+            questions_dict = await self._get_cached_or_fetched_questions(examination_id)
+            _, questions_digest = self._get_encoded_questions(examination_id, questions_dict)
+
+            version_key = cache_keys.answer_sheet_version(admit_card_id)
+            version = await self.cache.get(version_key)
+            if version is None:
+                # a fresh value, never one an expired version may have handed out before
+                await self.cache.set(version_key, time.time_ns(), nx=True, ex=cache_keys.TTL['exam_attempts'])
+                version = await self.cache.get(version_key)
+            return ServiceResult(make_etag(questions_digest, version))
+        except Exception as e:
+            logger.error("Error retrieving questions version for examination: %s", e)
+            return ServiceResult(AppException.RequestGetItem({"ERROR": f"Error retrieving questions version for examination: {str(e)}"}))
+
+    def _get_encoded_questions(self, examination_id: int, questions_dict):
+        # Each question is encoded once per worker up to its answer value, together with a digest
+        # of the whole list. The entry remembers the question list it was built from, so a
+        # reloaded or invalidated list is encoded again.
+        local_encoded = get_local_cache('examination_questions_encoded')
+        cached = local_encoded.get(examination_id)
+        if cached is not None and cached[0] is questions_dict:
+            return cached[1], cached[2]
+
+        encoded_questions = []
+        for question in QuestionAuthList.validate_python(questions_dict):
+            encoded = question.model_dump_json(exclude={'answer'}).encode('utf-8')
+            encoded_questions.append((question.id, encoded[:-1] + b',"answer":'))
+        questions_digest = digest(b''.join(prefix for _, prefix in encoded_questions))
+        local_encoded.set(examination_id, (questions_dict, encoded_questions, questions_digest))
+        return encoded_questions, questions_digest
+
+    async def _get_answers(self, examination_id: int, admit_card_id: int, question_ids: List[int]):
+        return await AnswerSheet(self.db, self.cache).get(examination_id, admit_card_id, question_ids)
+
+    def _merge_questions_with_attempts(self, questions_dict, ques_id_vs_answers):
 
         
 
         return [
-            {**question, 'answer': ques_id_vs_ques_attempts[question['id']].answer 
-            if question['id'] in ques_id_vs_ques_attempts else None}
+            {**question, 'answer': ques_id_vs_answers.get(question['id'])}
             for question in questions_dict
         ]
 
@@ -152,16 +274,18 @@ class QuestionCRUD(AppCRUD):
         Upsert question by id.
         """
         try:
-            stmt = insert(model).values(id=id, **schema.dict()).on_conflict_do_update(
+            stmt = insert(model).values(id=id, **schema.model_dump()).on_conflict_do_update(
                 index_elements=['id',''],
-                set_={field: getattr(schema, field) for field in schema.dict()}
+                set_={field: getattr(schema, field) for field in schema.model_dump()}
             )
-            result = self.db.execute(stmt)
-            self.db.commit()
-            return self.db.query(model).filter(model.id == id).first()
+            result = await self.db.execute(stmt)
+            await self.db.commit()
+            record = await self.db.scalar(select(model).filter(model.id == id))
+            await invalidate_examination(record.examination_id, ('questions', id))
+            return record
         except Exception as e:
-            self.db.rollback()  # Rollback in case of error
-            logger.error(f'Error upserting question: {str(e)}')
+            await self.db.rollback()  # Rollback in case of error
+            logger.error('Error upserting question: %s', e)
             raise AppException.RequestUpdateItem({"ERROR": f"Error upserting question: {str(e)}"})
 
     async def get_all(self, model, skip: int = 0, limit: int = 200, filters: Optional[List[Any]] = None) -> QuestionModel:
@@ -169,12 +293,12 @@ class QuestionCRUD(AppCRUD):
         Retrieve all examinations.
         """
         try:
-            query = self.db.query(model)
+            query = select(model)
             if filters:
                 query = query.filter(*filters)
-            return query.order_by(asc(model.id)).offset(skip).limit(limit).all()
+            return (await self.db.scalars(query.order_by(asc(model.id)).offset(skip).limit(limit))).all()
         except Exception as e:
-            logger.error(f'Error retrieving examinations: {str(e)}')
+            logger.error('Error retrieving examinations: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving examinations: {str(e)}"})
 
     async def create(self, model, examination_id: int, question: QuestionSchema) -> QuestionModel:
@@ -182,13 +306,14 @@ class QuestionCRUD(AppCRUD):
         Create new question.
         """
         try:
-            question = model(examination_id=examination_id, **question.dict())
+            question = model(examination_id=examination_id, **question.model_dump())
             self.db.add(question)
-            self.db.commit()
-            self.db.refresh(question)
+            await self.db.commit()
+            await self.db.refresh(question)
+            await invalidate_examination(examination_id)
             return question
         except Exception as e:
-            logger.error(f'Error creating question: {str(e)}')
+            logger.error('Error creating question: %s', e)
             return AppException.RequestCreateItem( {"ERROR": f"Error creating question: {str(e)}"})
 
     async def get(self, model, id: int) -> QuestionModel:
@@ -196,11 +321,11 @@ class QuestionCRUD(AppCRUD):
         Retrieve question by id.
         """
         try:
-            res =  self.db.query(model ).\
-                filter(model.id == id).first()
+            res =  await self.db.scalar(select(model ).\
+                filter(model.id == id))
             return res
         except Exception as e:
-            logger.error(f'Error retrieving question: {str(e)}')
+            logger.error('Error retrieving question: %s', e)
             return AppException.RequestGetItem( {"ERROR": f"Error retrieving question: {str(e)}"})
 
     async def update(self, model, id: int, schema) -> QuestionModel:
@@ -208,20 +333,21 @@ class QuestionCRUD(AppCRUD):
         Update question by id.
         """
         try:
-            record = self.db.query(model).filter(model.id == id).first()
+            record = await self.db.scalar(select(model).filter(model.id == id))
             if not record:
                 raise ValueError("Record not found")
 
             # Update the record with the new values
-            for field, value in schema.dict().items():
+            for field, value in schema.model_dump().items():
                 if hasattr(record, field):
                     setattr(record, field, value)
 
-            self.db.commit()
-            self.db.refresh(record)
+            await self.db.commit()
+            await self.db.refresh(record)
+            await invalidate_examination(record.examination_id, ('questions', id))
             return record
         except Exception as e:
-            logger.error(f'Error updating question: {str(e)}')
+            logger.error('Error updating question: %s', e)
             return AppException.RequestUpdateItem( {"ERROR": f"Error updating question: {str(e)}"})
 
     async def delete(self, model, id: int) -> bool:
@@ -229,11 +355,12 @@ class QuestionCRUD(AppCRUD):
         Delete question by id.
         """
         try:
-            question = self.db.query(model).filter(model.id == id).first()
-            self.db.delete(question)
-            self.db.commit()
+            question = await self.db.scalar(select(model).filter(model.id == id))
+            await self.db.delete(question)
+            await self.db.commit()
+            await invalidate_examination(question.examination_id, ('questions', id))
             return True
         except Exception as e:
-            logger.error(f'Error deleting question: {str(e)}')
+            logger.error('Error deleting question: %s', e)
             return AppException.RequestDeleteItem( {"ERROR": f"Error deleting question: {str(e)}"})
         
@@ -0,0 +1,155 @@
+from app.utils.app_exceptions import AppException
+from app.services.main import AppService
+from app.utils.service_request import ServiceResult
+
+from app.models.examination import Examination as ExaminationModel
+from app.services.examination import ExaminationCRUD
+from app.services.question import QuestionService
+from app.services.queschoice import QuesChoiceService
+from app.services.exam_attempt import ExamAttemptCRUD
+from app.services.exam_gate import ExamGate
+
+from app.db.session import AsyncSessionDB
+from app.db.redis import AsyncRedis
+from app.db.local_cache import get_local_cache
+from app.db import cache_keys, invalidation
+from app.db.invalidation import examination_version
+from app.utils import serializer
+
+from datetime import datetime, timedelta
+
+import asyncio
+import logging
+import os
+import pytz
+
+logger = logging.getLogger(__name__)
+
+
+# Every worker loads a warmed examination into its local cache when its id is published here.
+CHANNEL = 'cache:warm'
+
+
+def lead_minutes() -> float:
+    return float(os.environ.get('WARMUP_LEAD_MINUTES', 10))
+
+
+class WarmupService(AppService):
+
+    async def warm_examination(self, examination_id: int) -> ServiceResult:
+        """
+        Load an examination, its questions, their choices and the exam attempts of its candidates,
+        created here when missing, into Redis, then have every worker load the content into its local cache.
+        """
+        try:
+            content = await self._load_content(examination_id)
+            if content is None:
+                return ServiceResult(AppException.RequestGetItem({"ERROR": f"Examination {examination_id} not found"}))
+
+            await ExamGate(self.db, self.cache)._cache_window(examination_id)
+            exam_attempts = await ExamAttemptCRUD(self.db, self.cache).cache_all(examination_id)
+            await self.cache.publish(CHANNEL, serializer.dumps(examination_id))
+            return ServiceResult({'examination_id': examination_id, 'questions': len(content[1]), 'exam_attempts': exam_attempts})
+        except Exception as e:
+            logger.error('Error warming examination %s: %s', examination_id, e)
+            return ServiceResult(AppException.RequestGetItem({"ERROR": f"Error warming examination {examination_id}: {str(e)}"}))
+
+    async def warm_upcoming(self, force: bool = False) -> ServiceResult:
+        """
+        Warm the examinations starting within WARMUP_LEAD_MINUTES that were not warmed yet,
+        or all of them when force is set.
+        """
+        try:
+            now = datetime.now(pytz.utc)
+            lead = timedelta(minutes=lead_minutes())
+            examinations = await ExaminationCRUD(self.db).get_all(filters=[ExaminationModel.exam_start_dt > now,
+                                                                           ExaminationModel.exam_start_dt <= now + lead])
+            warmed = []
+            for examination in examinations:
+                # the marker outlives the lead window, so each worker's scheduler skips an exam already warmed;
+                # it is dropped again when the warm fails, and an exam whose version was bumped gets a new one
+                marker = cache_keys.examination_warmup(examination.id, await examination_version(self.cache, examination.id))
+                if force or await self.cache.set(marker, 1, nx=True, ex=int(lead.total_seconds()) + 3600):
+                    try:
+                        result = await self.warm_examination(examination.id)
+                    except BaseException:
+                        await self.cache.delete(marker)
+                        raise
+                    if result.success:
+                        warmed.append(result.value)
+                    else:
+                        await self.cache.delete(marker)
+            return ServiceResult(warmed)
+        except Exception as e:
+            logger.error('Error warming upcoming examinations: %s', e)
+            return ServiceResult(AppException.RequestGetItem({"ERROR": f"Error warming upcoming examinations: {str(e)}"}))
+
+    async def load_local(self, examination_id: int) -> None:
+        """
+        Load a warmed examination into this worker's local cache and keep it there until the exam ends.
+        """
+        content = await self._load_content(examination_id)
+        if content is None:
+            return
+
+        examination, questions = content
+        ttl = (examination.exam_end_dt - datetime.now(pytz.utc)).total_seconds() if examination.exam_end_dt else 0
+        if ttl <= 0:
+            return
+        self._pin('examinations', examination_id, ttl)
+        self._pin('examination_questions', examination_id, ttl)
+        self._pin('examination_questions_encoded', examination_id, ttl)
+        for question in questions:
+            self._pin('questions', question['id'], ttl)
+            self._pin('question_choices', question['id'], ttl)
+
+    async def _load_content(self, examination_id: int):
+        # goes through the regular read paths, so Redis and the local cache end up filled
+        examination = await ExaminationCRUD(self.db, self.cache).get(examination_id)
+        if not isinstance(examination, ExaminationModel):
+            return None
+
+        question_service = QuestionService(self.db, self.cache)
+        questions = await question_service._get_cached_or_fetched_questions(examination_id)
+        question_service._get_encoded_questions(examination_id, questions)  # also builds the ETag digest
+
+        choice_service = QuesChoiceService(self.db, self.cache)
+        for question in questions:
+            await question_service._get_cached_or_fetched_question(question['id'])
+            await choice_service._get_cached_or_fetched_choices(question['id'])
+        return examination, questions
+
+    def _pin(self, namespace: str, key, ttl: float) -> None:
+        local_cache = get_local_cache(namespace)
+        value = local_cache.get(key)
+        if value is not None:
+            local_cache.set(key, value, ttl=ttl)
+
+
+async def _on_warm(examination_id: int) -> None:
+    db = AsyncSessionDB().get_session()
+    try:
+        await WarmupService(db, AsyncRedis().client).load_local(examination_id)
+    finally:
+        await db.close()
+
+
+invalidation.add_handler(CHANNEL, _on_warm)
+
+
+async def run_scheduler() -> None:
+    """
+    Background task warming upcoming examinations every WARMUP_INTERVAL seconds.
+    """
+    interval = float(os.environ.get('WARMUP_INTERVAL', 60))
+    while True:
+        db = AsyncSessionDB().get_session()
+        try:
+            await WarmupService(db, AsyncRedis().client).warm_upcoming()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error('Error running exam warm-up: %s', e)
+        finally:
+            await db.close()
+        await asyncio.sleep(interval)
@@ -2,6 +2,7 @@ from fastapi import Request
 from starlette.responses import JSONResponse
 from fastapi import Request
 from starlette.responses import JSONResponse
+from app.utils.serializer import ORJSONResponse
 
 class AppExceptionCase(Exception):
     def __init__(self, status_code: int, context: dict):
@@ -17,7 +18,7 @@ class AppExceptionCase(Exception):
 
 
 async def app_exception_handler(request: Request, exc: AppExceptionCase):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "app_exception": exc.exception_case,
@@ -37,6 +38,14 @@ class AppException(object):
             status_code = 403
             AppExceptionCase.__init__(self, status_code, context)
 
+    class ExaminationEnded(AppExceptionCase):
+        def __init__(self, context: dict = None):
+            """
+            Examination Ended
+            """
+            status_code = 403
+            AppExceptionCase.__init__(self, status_code, context)
+
     class ExamSubmitted(AppExceptionCase):
         def __init__(self, context: dict = None):
             """
@@ -67,6 +76,14 @@ class AppException(object):
 
 
 
+    class RequestTooManyAttempts(AppExceptionCase):
+        def __init__(self, context: dict = None):
+            """
+            Too many attempts, retry later
+            """
+            status_code = 429
+            AppExceptionCase.__init__(self, status_code, context)
+
     class RequestCreateItem(AppExceptionCase):
         def __init__(self, context: dict = None):
             """
@@ -0,0 +1,13 @@
+import os
+
+
+def catalogue() -> str:
+    """
+    Cache-Control of the public listings, so a CDN or reverse proxy can serve them.
+
+    They are fresh for CATALOGUE_MAX_AGE seconds, then served stale for up to
+    CATALOGUE_STALE_WHILE_REVALIDATE more seconds while the proxy fetches a new copy.
+    """
+    max_age = int(os.environ.get('CATALOGUE_MAX_AGE', 60))
+    stale = int(os.environ.get('CATALOGUE_STALE_WHILE_REVALIDATE', 600))
+    return f'public, max-age={max_age}, stale-while-revalidate={stale}'
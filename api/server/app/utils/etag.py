@@ -0,0 +1,25 @@
+import hashlib
+
+from fastapi import Request
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:20]
+
+
+def make_etag(*versions) -> str:
+    return '"' + '.'.join(map(str, versions)) + '"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """
+    Whether the If-None-Match header of request already names etag.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # a weak comparison is what If-None-Match asks for
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return etag in candidates
@@ -5,11 +5,18 @@ from typing import Any
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from app.schemas.admit_card import AdmitCard
+from app.db.local_cache import LocalCache
+import hashlib
 import os
+import time
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 
+# Payloads of tokens this worker already verified, keyed by the token digest. An entry never
+# outlives the token's exp, and JWT_CACHE_TTL bounds how long a payload is reused at all.
+_verified = LocalCache(maxsize=int(os.getenv("JWT_CACHE_MAXSIZE", 10000)), ttl=float(os.getenv("JWT_CACHE_TTL", 300)))
+
 def create_jwt_token(admit_card: dict) -> Any:
     """
     Create jwt token of admit card object.
@@ -25,9 +32,21 @@ def create_jwt_token(admit_card: dict) -> Any:
 def decode_jwt_token(token: str) -> Any:
     """
     Decode jwt token.
+
+    The payload may come from the verified token cache and is shared, callers must not mutate it.
     """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _verified.get(key)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+    ttl = _verified.ttl
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _verified.set(key, payload, ttl=ttl)
+    return payload
\ No newline at end of file
@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+
+# scrypt cost parameters, hashes made with other parameters are upgraded on the next login.
+SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(os.environ.get('PASSWORD_SCRYPT_R', 8))
+SCRYPT_P = int(os.environ.get('PASSWORD_SCRYPT_P', 1))
+
+# hashlib.scrypt releases the GIL, so a few threads hash in parallel without blocking the event loop.
+WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+_pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='password-hash')
+_stats = {'submitted': 0, 'running': 0, 'completed': 0, 'wait_ms': 0.0, 'run_ms': 0.0}
+_stats_lock = threading.Lock()
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _unb64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32)
+
+
+def _timed(submitted_at: float, fn, *args):
+    started_at = time.monotonic()
+    with _stats_lock:
+        _stats['running'] += 1
+    try:
+        return fn(*args)
+    finally:
+        with _stats_lock:
+            _stats['running'] -= 1
+            _stats['completed'] += 1
+            _stats['wait_ms'] += (started_at - submitted_at) * 1000
+            _stats['run_ms'] += (time.monotonic() - started_at) * 1000
+
+
+async def _run(fn, *args):
+    with _stats_lock:
+        _stats['submitted'] += 1
+    return await asyncio.get_running_loop().run_in_executor(_pool, _timed, time.monotonic(), fn, *args)
+
+
+async def make_password_hash(password: str) -> str:
+    """
+    Salted scrypt hash of password, computed in the hashing pool.
+    """
+    salt = os.urandom(16)
+    digest = await _run(_scrypt, password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f'scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}'
+
+
+async def check_password(password: str, password_hash: str) -> Tuple[bool, bool]:
+    """
+    Whether password matches password_hash, and whether the hash should be replaced by a
+    make_password_hash one. Unsalted MD5 hashes from before scrypt are still accepted.
+    """
+    if not password_hash:
+        return False, False
+
+    if not password_hash.startswith('scrypt$'):
+        legacy = hashlib.md5(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, password_hash), True
+
+    _, n, r, p, salt, expected = password_hash.split('$')
+    n, r, p = int(n), int(r), int(p)
+    digest = await _run(_scrypt, password, _unb64(salt), n, r, p)
+    return hmac.compare_digest(digest, _unb64(expected)), (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+def pool_stats() -> Dict[str, float]:
+    """
+    Saturation of the hashing pool: queued jobs wait for one of the workers.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    completed = stats['completed']
+    return {
+        'workers': WORKERS,
+        'running': stats['running'],
+        'queued': stats['submitted'] - completed - stats['running'],
+        'completed': completed,
+        'avg_wait_ms': round(stats['wait_ms'] / completed, 2) if completed else 0.0,
+        'avg_run_ms': round(stats['run_ms'] / completed, 2) if completed else 0.0,
+    }
@@ -6,6 +6,7 @@ from starlette.exceptions import HTTPException
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
+from app.utils.serializer import ORJSONResponse
 
 
 
@@ -13,7 +14,7 @@ from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
 async def http_exception_handler(
     request: Request, exc: HTTPException
 ) -> JSONResponse:
-    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+    return ORJSONResponse({"detail": exc.detail}, status_code=exc.status_code)
 
 
 
@@ -21,7 +22,7 @@ async def http_exception_handler(
 async def request_validation_exception_handler(
     request: Request, exc: RequestValidationError
 ) -> JSONResponse:
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": jsonable_encoder(exc.errors())},
     )
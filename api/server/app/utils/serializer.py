@@ -0,0 +1,43 @@
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse, Response
+from typing import Any, Dict, Optional
+
+import json
+import orjson
+
+
+def dumps(value: Any, sort_keys: bool = False) -> bytes:
+    """
+    UTF-8 JSON of value. Datetimes are written in ISO 8601, other types orjson does not know
+    as their str(), like json.dumps(value, default=str) did.
+    """
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return orjson.dumps(value, default=str, option=option)
+
+
+def loads(data) -> Any:
+    """
+    Parse JSON from bytes or str.
+    """
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # values cached by json.dumps may hold NaN or Infinity, which orjson rejects
+        return json.loads(data)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with dumps, the default response class of the app.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def validated_response(adapter: TypeAdapter, value: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    value validated and encoded by a schema TypeAdapter in pydantic-core, for the list
+    responses. FastAPI returns a Response as is, without validating it again.
+    """
+    return Response(adapter.dump_json(adapter.validate_python(value)), media_type='application/json', headers=headers)
@@ -1,5 +1,5 @@
 import logging
-import inspect
+import sys
 
 
 from app.utils.app_exceptions import AppExceptionCase
@@ -44,8 +44,9 @@ class ServiceResult(object):
 
 
 def caller_info() -> str:
-    info = inspect.getframeinfo(inspect.stack()[2][0])
-    return f"{info.filename}:{info.function}:{info.lineno}"
+    # the frame of whoever called handle_result, without building the whole stack with source lines
+    frame = sys._getframe(2)
+    return f"{frame.f_code.co_filename}:{frame.f_code.co_name}:{frame.f_lineno}"
 
 
 
@@ -53,7 +54,7 @@ def caller_info() -> str:
 def handle_result(result: ServiceResult):
     if not result.success:
         with result as exception:
-            logger.error(f"{exception} | caller={caller_info()}")
+            logger.error("%s | caller=%s", exception, caller_info())
             raise exception
     with result as result:
         return result
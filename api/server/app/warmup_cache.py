@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import logging
+
+
+from app.db.session import AsyncSessionDB, dispose_async_engines
+from app.db.redis import AsyncRedis, close_pool
+from app.services.warmup import WarmupService
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+
+
+async def warm(examination_ids) -> None:
+    db = AsyncSessionDB().get_session()
+    try:
+        service = WarmupService(db, AsyncRedis().client)
+        if examination_ids:
+            results = [await service.warm_examination(examination_id) for examination_id in examination_ids]
+        else:
+            results = [await service.warm_upcoming(force=True)]
+        for result in results:
+            if result.success:
+                logger.info("Warmed %s", result.value)
+            else:
+                logger.error("Warm-up failed %s", result.value)
+    finally:
+        await db.close()
+        await dispose_async_engines()
+        await close_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Preload the exam caches before an exam starts.")
+    parser.add_argument("examination_ids", nargs="*", type=int,
+                        help="examinations to warm, by default every examination starting within WARMUP_LEAD_MINUTES")
+    args = parser.parse_args()
+    logger.info("Warming exam caches")
+    asyncio.run(warm(args.examination_ids))
+    logger.info("Exam caches warmed")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -23,12 +23,15 @@ export APP_MODULE=${APP_MODULE:-app.main:app}
 export HOST=${HOST:-0.0.0.0}
 export PORT=${PORT:-8001}
 export ENTRYPOINT=${ENTRYPOINT:-./app/main.py}
+# proxies whose X-Forwarded-For / X-Forwarded-Proto are trusted, comma separated
+export FORWARDED_ALLOW_IPS=${FORWARDED_ALLOW_IPS:-127.0.0.1}
 
 
 # #run the python script
 # python "$ENTRYPOINT"
 exec gunicorn --bind $HOST:$PORT "$APP_MODULE" \
   -k uvicorn.workers.UvicornWorker \
+  --forwarded-allow-ips "$FORWARDED_ALLOW_IPS" \
   -w 4
 
 